@@ -8,6 +8,7 @@ ATT&CK technique table, and confidence assessments.
 from __future__ import annotations
 
 import html
+import re
 from datetime import datetime
 
 from models import Report, TLPLevel
@@ -594,8 +595,6 @@ def _render_footnotes(content: str, citations: list[str]) -> str:
     HTML-escape content and inject clickable footnote superscripts
     for any [N] citation patterns found.
     """
-    import re
-
     escaped = _esc(content)
 
     # Replace [N] with clickable superscript
@@ -2,14 +2,16 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 import time
 from collections import defaultdict
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional
 
-from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
@@ -25,8 +27,10 @@ from models import (
     TLPLevel,
 )
 from research.engine import run_research, run_research_from_sources
+from research.http_client import aclose_client
 from research.perplexity import PerplexityNotAvailable
 from report.generator import generate_report
+from report.ioc_extractor import shutdown_pool as shutdown_ioc_pool
 from export.markdown import export_markdown
 from export.html import export_html
 from attack.mapper import lookup_technique as attack_lookup_technique, map_techniques_from_text
@@ -42,10 +46,20 @@ logger = logging.getLogger(__name__)
 
 # ─── App ──────────────────────────────────────────────────────────────────────
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Release the shared HTTP connection pool and IOC worker pool on shutdown."""
+    yield
+    await aclose_client()
+    await asyncio.to_thread(shutdown_ioc_pool)
+
+
 app = FastAPI(
     title="CyberBRIEF API",
     description="Automated cyber threat intelligence research and reporting.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # ─── CORS ─────────────────────────────────────────────────────────────────────
@@ -99,7 +113,9 @@ async def health_check() -> HealthResponse:
 
 
 @app.post("/api/research")
-async def research_endpoint(request: ResearchRequest, req: Request) -> dict:
+async def research_endpoint(
+    request: ResearchRequest, req: Request, background_tasks: BackgroundTasks,
+) -> dict:
     """
     Run the research pipeline for a given topic and tier.
 
@@ -112,6 +128,7 @@ async def research_endpoint(request: ResearchRequest, req: Request) -> dict:
             topic=request.topic,
             tier=request.tier,
             api_keys=request.api_keys,
+            background_tasks=background_tasks,
         )
         return bundle.model_dump(by_alias=True)
     except ValueError as exc:
@@ -131,7 +148,9 @@ async def research_endpoint(request: ResearchRequest, req: Request) -> dict:
 
 
 @app.post("/api/research/from-sources")
-async def research_from_sources_endpoint(request: SourceResearchRequest, req: Request) -> dict:
+async def research_from_sources_endpoint(
+    request: SourceResearchRequest, req: Request, background_tasks: BackgroundTasks,
+) -> dict:
     """
     Run the research pipeline from user-provided sources (URLs, text, PDFs).
 
@@ -149,6 +168,7 @@ async def research_from_sources_endpoint(request: SourceResearchRequest, req: Re
             topic=request.topic,
             sources=request.sources,
             api_keys=request.api_keys,
+            background_tasks=background_tasks,
         )
         return bundle.model_dump(by_alias=True)
     except ValueError as exc:
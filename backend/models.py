@@ -154,6 +154,7 @@ class ResearchMetadata(BaseModel):
     total_duration_ms: int = Field(alias="totalDurationMs", default=0)
     search_provider: str = Field(alias="searchProvider", default="brave")
     synthesis_model: str = Field(alias="synthesisModel", default="gemini-2.0-flash")
+    cache_hit: bool = Field(alias="cacheHit", default=False)
 
     model_config = {"populate_by_name": True}
 
@@ -9,6 +9,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from typing import Optional
+from urllib.parse import urlparse
 
 
 def _format_date(date_str: str) -> str:
@@ -24,7 +25,6 @@ def _format_date(date_str: str) -> str:
 def _extract_site_name(url: str) -> str:
     """Extract a human-readable site/organization name from a URL."""
     try:
-        from urllib.parse import urlparse
         parsed = urlparse(url)
         host = parsed.hostname or ""
         # Strip www prefix
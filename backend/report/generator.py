@@ -6,10 +6,12 @@ Chicago NB citations, confidence assessments, and IOC extraction.
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import logging
 import re
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional
 
 from models import (
@@ -32,11 +34,42 @@ from report.chicago_formatter import (
     format_sources_as_bibliography,
     format_sources_as_endnotes,
 )
-from report.ioc_extractor import extract_iocs
+from report.ioc_extractor import PARALLEL_MIN_CHARS, extract_iocs, extract_iocs_batched, split_text
 from attack.mapper import map_techniques_from_text, lookup_technique, enrich_attack_mapping
 
 logger = logging.getLogger(__name__)
 
+# ─── Classification keywords ─────────────────────────────────────────────────
+#
+# Substring cues (some contain spaces, so these are matched with `in` rather
+# than word lookups) used to sort sentences and paragraphs into BLUF parts and
+# report sections.
+
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+
+_BLUF_DRIVER_KWS = (
+    "because", "due to", "driven by", "result of", "caused by",
+    "exploit", "vulnerab", "campaign", "attack", "target", "observed",
+    "discovered", "reported", "identified", "compromis",
+)
+_BLUF_IMPLICATION_KWS = (
+    "impact", "affect", "consequence", "risk", "damage", "disrupt",
+    "significan", "critical", "operation", "business", "sector",
+    "implication", "this means", "therefore",
+)
+_BLUF_INDICATOR_KWS = (
+    "indicator", "watch", "monitor", "signal", "suggest", "if ",
+    "increase", "decrease", "escalat", "continu", "future", "expect",
+    "predict", "likely to", "trend",
+)
+
+_ACTOR_KWS = ("actor", "group", "apt", "threat", "attributed", "campaign")
+_TARGET_KWS = ("target", "victim", "sector", "industry", "organization")
+_INTENT_KWS = ("intent", "motiv", "objective", "goal", "purpose", "espionage", "financial")
+_TTP_KWS = ("technique", "tactic", "procedure", "ttp", "attack")
+_TOOL_KWS = ("malware", "tool", "implant", "backdoor", "payload", "ransomware")
+_REMEDIATION_KWS = ("mitigat", "remediat", "patch", "recommend", "defend", "protect")
+
 
 def _generate_report_id(topic: str) -> str:
     """Generate a deterministic but unique report ID."""
@@ -113,33 +146,24 @@ def _build_bluf(topic: str, content: str, source_count: int) -> str:
         )
 
     # Extract substantive sentences for drivers, implications, and indicators
-    sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', content) if len(s.strip()) > 30]
+    sentences = [s for s in map(str.strip, _SENTENCE_SPLIT_RE.split(content)) if len(s) > 30]
 
     # Classify sentences into categories by keyword heuristics
     driver_sentences: list[str] = []
     implication_sentences: list[str] = []
     indicator_sentences: list[str] = []
+    add_driver = driver_sentences.append
+    add_implication = implication_sentences.append
+    add_indicator = indicator_sentences.append
 
     for s in sentences:
         s_lower = s.lower()
-        if any(kw in s_lower for kw in [
-            "because", "due to", "driven by", "result of", "caused by",
-            "exploit", "vulnerab", "campaign", "attack", "target", "observed",
-            "discovered", "reported", "identified", "compromis",
-        ]):
-            driver_sentences.append(s)
-        elif any(kw in s_lower for kw in [
-            "impact", "affect", "consequence", "risk", "damage", "disrupt",
-            "significan", "critical", "operation", "business", "sector",
-            "implication", "this means", "therefore",
-        ]):
-            implication_sentences.append(s)
-        elif any(kw in s_lower for kw in [
-            "indicator", "watch", "monitor", "signal", "suggest", "if ",
-            "increase", "decrease", "escalat", "continu", "future", "expect",
-            "predict", "likely to", "trend",
-        ]):
-            indicator_sentences.append(s)
+        if any(kw in s_lower for kw in _BLUF_DRIVER_KWS):
+            add_driver(s)
+        elif any(kw in s_lower for kw in _BLUF_IMPLICATION_KWS):
+            add_implication(s)
+        elif any(kw in s_lower for kw in _BLUF_INDICATOR_KWS):
+            add_indicator(s)
 
     # Build drivers (2-4 key evidence points)
     drivers = driver_sentences[:4] if driver_sentences else sentences[:3]
@@ -208,54 +232,78 @@ def _build_bluf(topic: str, content: str, source_count: int) -> str:
     return "".join(parts)
 
 
-def _extract_threat_actor(topic: str, content: str) -> ThreatActorProfile:
-    """Extract or infer threat actor profile from synthesized content."""
-    # Use the topic as the actor name baseline
-    name = topic.strip()
+# Alias, attribution and tooling cues scanned in one pass. Each alternative is
+# wrapped in a lookahead so a long alias list cannot consume an attribution or
+# tooling phrase that starts inside it; the first hit per group wins.
+_ACTOR_FIELDS_RE = re.compile(
+    r"(?=(?:also known as|a\.?k\.?a\.?|aliases?[:\s]+)(?P<aka>[^.]+))"
+    r"|(?=(?:attributed to|linked to|associated with|backed by|sponsored by)\s+(?P<attr>[^.,:;]+))"
+    r"|(?=(?:using|deploys?|utiliz(?:es?|ing)|leverag(?:es?|ing)|tools?\s+(?:include|such as))\s+(?P<tool>[^.]+))",
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=256)
+def _threat_actor_fields(content: str) -> tuple[tuple[str, ...], str, tuple[str, ...]]:
+    """Return (aliases, attribution, tooling) parsed from synthesized content.
+
+    Cached because the same bundle is often regenerated with a different
+    report type or TLP marking.
+    """
+    found: dict[str, str] = {}
+    for m in _ACTOR_FIELDS_RE.finditer(content):
+        group = m.lastgroup
+        if group not in found:
+            found[group] = m.group(group)
+            if len(found) == 3:
+                break
+
     aliases: list[str] = []
     attribution = "Unknown"
     tooling: list[str] = []
 
-    # Try to extract aliases from content (patterns like "also known as X, Y")
-    aka_match = re.search(
-        r"(?:also known as|a\.?k\.?a\.?|aliases?[:\s]+)([^.]+)",
-        content,
-        re.IGNORECASE,
-    )
-    if aka_match:
-        raw_aliases = aka_match.group(1)
-        aliases = [a.strip().strip(",").strip() for a in re.split(r"[,;/]|and\b", raw_aliases) if a.strip()]
+    # Aliases (patterns like "also known as X, Y")
+    if "aka" in found:
+        aliases = [a.strip().strip(",").strip() for a in re.split(r"[,;/]|and\b", found["aka"]) if a.strip()]
         aliases = [a for a in aliases if len(a) > 1 and len(a) < 60][:10]
 
-    # Try to extract attribution (country/group)
-    attr_match = re.search(
-        r"(?:attributed to|linked to|associated with|backed by|sponsored by)\s+([^.,:;]+)",
-        content,
-        re.IGNORECASE,
-    )
-    if attr_match:
-        attribution = attr_match.group(1).strip()[:100]
+    # Attribution (country/group)
+    if "attr" in found:
+        attribution = found["attr"].strip()[:100]
 
-    # Try to extract tools/malware
-    tool_patterns = [
-        r"(?:using|deploys?|utiliz(?:es?|ing)|leverag(?:es?|ing)|tools?\s+(?:include|such as))\s+([^.]+)",
-    ]
-    for pattern in tool_patterns:
-        tool_match = re.search(pattern, content, re.IGNORECASE)
-        if tool_match:
-            raw_tools = tool_match.group(1)
-            tooling = [t.strip().strip(",").strip() for t in re.split(r"[,;]|and\b", raw_tools) if t.strip()]
-            tooling = [t for t in tooling if len(t) > 1 and len(t) < 60][:10]
-            break
+    # Tools/malware
+    if "tool" in found:
+        tooling = [t.strip().strip(",").strip() for t in re.split(r"[,;]|and\b", found["tool"]) if t.strip()]
+        tooling = [t for t in tooling if len(t) > 1 and len(t) < 60][:10]
+
+    return tuple(aliases), attribution, tuple(tooling)
 
+
+def _extract_threat_actor(topic: str, content: str) -> ThreatActorProfile:
+    """Extract or infer threat actor profile from synthesized content."""
+    aliases, attribution, tooling = _threat_actor_fields(content)
+
+    # Use the topic as the actor name baseline
     return ThreatActorProfile(
-        name=name,
-        aliases=aliases,
+        name=topic.strip(),
+        aliases=list(aliases),
         attribution=attribution,
-        tooling=tooling,
+        tooling=list(tooling),
     )
 
 
+def _first_paragraph_with(
+    paragraphs: list[str],
+    paragraphs_lc: list[str],
+    keywords: tuple[str, ...],
+) -> str:
+    """Return the first paragraph whose lowercased text contains any keyword."""
+    for p, p_lower in zip(paragraphs, paragraphs_lc):
+        if any(kw in p_lower for kw in keywords):
+            return p
+    return ""
+
+
 def _build_sections(
     topic: str,
     content: str,
@@ -271,6 +319,8 @@ def _build_sections(
     paragraphs = [p.strip() for p in content.split("\n\n") if p.strip()]
     if not paragraphs:
         paragraphs = [content]
+    # Lowercase once; every section below scans the same paragraphs
+    paragraphs_lc = [p.lower() for p in paragraphs]
 
     # Source citation references
     source_refs = [f"[{i+1}]" for i in range(len(sources))]
@@ -285,11 +335,7 @@ def _build_sections(
     ))
 
     # ── Threat Actor Profile ──────────────────────────────────────────────
-    actor_content = ""
-    for p in paragraphs:
-        if any(kw in p.lower() for kw in ["actor", "group", "apt", "threat", "attributed", "campaign"]):
-            actor_content = p
-            break
+    actor_content = _first_paragraph_with(paragraphs, paragraphs_lc, _ACTOR_KWS)
     if not actor_content and len(paragraphs) > 1:
         actor_content = paragraphs[1]
     sections.append(ReportSection(
@@ -300,11 +346,7 @@ def _build_sections(
     ))
 
     # ── Targets / Victimology ─────────────────────────────────────────────
-    targets_content = ""
-    for p in paragraphs:
-        if any(kw in p.lower() for kw in ["target", "victim", "sector", "industry", "organization"]):
-            targets_content = p
-            break
+    targets_content = _first_paragraph_with(paragraphs, paragraphs_lc, _TARGET_KWS)
     sections.append(ReportSection(
         id="targets",
         title="Targets & Victimology",
@@ -313,11 +355,7 @@ def _build_sections(
     ))
 
     # ── Intentions / Motivation ───────────────────────────────────────────
-    intentions_content = ""
-    for p in paragraphs:
-        if any(kw in p.lower() for kw in ["intent", "motiv", "objective", "goal", "purpose", "espionage", "financial"]):
-            intentions_content = p
-            break
+    intentions_content = _first_paragraph_with(paragraphs, paragraphs_lc, _INTENT_KWS)
     sections.append(ReportSection(
         id="intentions",
         title="Intentions & Motivations",
@@ -335,11 +373,7 @@ def _build_sections(
                 )
             ttp_content = "\n\n".join(ttp_lines)
         else:
-            ttp_content = ""
-            for p in paragraphs:
-                if any(kw in p.lower() for kw in ["technique", "tactic", "procedure", "ttp", "attack"]):
-                    ttp_content = p
-                    break
+            ttp_content = _first_paragraph_with(paragraphs, paragraphs_lc, _TTP_KWS)
             if not ttp_content:
                 ttp_content = "Detailed TTPs require further analysis from primary source material."
         sections.append(ReportSection(
@@ -350,11 +384,7 @@ def _build_sections(
         ))
 
         # ── Tools & Malware ───────────────────────────────────────────────
-        tools_content = ""
-        for p in paragraphs:
-            if any(kw in p.lower() for kw in ["malware", "tool", "implant", "backdoor", "payload", "ransomware"]):
-                tools_content = p
-                break
+        tools_content = _first_paragraph_with(paragraphs, paragraphs_lc, _TOOL_KWS)
         sections.append(ReportSection(
             id="tools-malware",
             title="Tools & Malware",
@@ -394,11 +424,7 @@ def _build_sections(
     ))
 
     # ── Remediation ───────────────────────────────────────────────────────
-    remediation_content = ""
-    for p in paragraphs:
-        if any(kw in p.lower() for kw in ["mitigat", "remediat", "patch", "recommend", "defend", "protect"]):
-            remediation_content = p
-            break
+    remediation_content = _first_paragraph_with(paragraphs, paragraphs_lc, _REMEDIATION_KWS)
     sections.append(ReportSection(
         id="remediation",
         title="Remediation & Recommendations",
@@ -433,18 +459,20 @@ async def generate_report(
     report_id = _generate_report_id(bundle.topic)
     now = datetime.now(timezone.utc).isoformat()
 
-    # Extract IOCs from synthesized content
-    content_iocs = extract_iocs(bundle.synthesized_content)
-    # Merge with any IOCs already in the bundle
-    all_iocs = list(bundle.extracted_iocs) + content_iocs
-    # Deduplicate by (type, value)
-    seen_iocs: set[tuple[str, str]] = set()
-    unique_iocs: list[IOC] = []
-    for ioc in all_iocs:
-        key = (ioc.type, ioc.value)
-        if key not in seen_iocs:
-            seen_iocs.add(key)
-            unique_iocs.append(ioc)
+    # Merge bundle IOCs with those extracted from the synthesized content,
+    # deduplicating by (type, value); the first occurrence wins
+    merged_iocs: dict[tuple[str, str], IOC] = {}
+    for ioc in bundle.extracted_iocs:
+        merged_iocs.setdefault((ioc.type, ioc.value), ioc)
+    content = bundle.synthesized_content
+    if len(content) >= PARALLEL_MIN_CHARS:
+        # Waiting on the worker pool blocks; keep it off the event loop
+        content_iocs = await asyncio.to_thread(extract_iocs_batched, split_text(content))
+    else:
+        content_iocs = extract_iocs(content)
+    for ioc in content_iocs:
+        merged_iocs.setdefault((ioc.type, ioc.value), ioc)
+    unique_iocs = list(merged_iocs.values())
 
     # Build BLUF
     bluf = _build_bluf(bundle.topic, bundle.synthesized_content, len(bundle.sources))
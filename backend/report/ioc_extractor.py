@@ -2,20 +2,31 @@
 
 from __future__ import annotations
 
+import os
 import re
 import logging
-from typing import Optional
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Optional
 
 from models import IOC, IOCType
 
 logger = logging.getLogger(__name__)
 
 # ─── Regex Patterns ───────────────────────────────────────────────────────────
+#
+# Every indicator we match is pure ASCII, so the character classes spell out
+# their ASCII ranges ([0-9], not \d). The patterns are deliberately not
+# compiled with re.ASCII: \b must still see accented letters as word
+# characters, or "Telefónica.com" would yield the domain "nica.com". URL_RE's
+# negated \s likewise keeps stopping at Unicode whitespace (e.g. U+00A0 left
+# behind by scraped HTML).
 
 # IPv4: dotted quad with octet validation
 IPV4_RE = re.compile(
-    r"\b(?:(?:25[0-5]|2[0-4]\d|1\d{2}|[1-9]?\d)\.){3}"
-    r"(?:25[0-5]|2[0-4]\d|1\d{2}|[1-9]?\d)\b"
+    r"\b(?:(?:25[0-5]|2[0-4][0-9]|1[0-9]{2}|[1-9]?[0-9])\.){3}"
+    r"(?:25[0-5]|2[0-4][0-9]|1[0-9]{2}|[1-9]?[0-9])\b"
 )
 
 # IPv6: simplified but covers common formats
@@ -49,7 +60,16 @@ SHA1_RE = re.compile(r"\b[a-fA-F0-9]{40}\b")
 SHA256_RE = re.compile(r"\b[a-fA-F0-9]{64}\b")
 
 # CVE IDs
-CVE_RE = re.compile(r"\bCVE-\d{4}-\d{4,}\b", re.IGNORECASE)
+CVE_RE = re.compile(r"\bCVE-[0-9]{4}-[0-9]{4,}\b", re.IGNORECASE)
+
+# Batched extraction: texts at least this long are split into chunks of about
+# CHUNK_CHARS and scanned across worker processes. Below the threshold, process
+# start-up and pickling cost more than the regex work they would save.
+PARALLEL_MIN_CHARS = 256 * 1024
+CHUNK_CHARS = 64 * 1024
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
 
 # Known false-positive domains to exclude
 EXCLUDED_DOMAINS = {
@@ -130,6 +150,12 @@ def extract_iocs(text: str) -> list[IOC]:
                 IOC(type=ioc_type, value=value, context=context, sources=[])
             )
 
+    # Cheap substring checks that rule out whole pattern families before
+    # running their regexes. Every IPv6 form we match has at least two colons.
+    has_cve = "cve-" in text.lower()
+    has_ipv6 = text.count(":") >= 2
+    has_url = "://" in text
+
     # Extract SHA256 first (longest hash, to avoid partial matches)
     for m in SHA256_RE.finditer(text):
         value = m.group().lower()
@@ -155,10 +181,11 @@ def extract_iocs(text: str) -> list[IOC]:
             _add(IOCType.MD5, value, ctx)
 
     # CVE IDs
-    for m in CVE_RE.finditer(text):
-        value = m.group().upper()
-        ctx = _get_context(text, m.start(), m.end())
-        _add(IOCType.CVE, value, ctx)
+    if has_cve:
+        for m in CVE_RE.finditer(text):
+            value = m.group().upper()
+            ctx = _get_context(text, m.start(), m.end())
+            _add(IOCType.CVE, value, ctx)
 
     # IPv4
     for m in IPV4_RE.finditer(text):
@@ -168,16 +195,18 @@ def extract_iocs(text: str) -> list[IOC]:
             _add(IOCType.IPV4, value, ctx)
 
     # IPv6
-    for m in IPV6_RE.finditer(text):
-        value = m.group().lower()
-        ctx = _get_context(text, m.start(), m.end())
-        _add(IOCType.IPV6, value, ctx)
+    if has_ipv6:
+        for m in IPV6_RE.finditer(text):
+            value = m.group().lower()
+            ctx = _get_context(text, m.start(), m.end())
+            _add(IOCType.IPV6, value, ctx)
 
     # URLs
-    for m in URL_RE.finditer(text):
-        value = m.group().rstrip(".,;:)")
-        ctx = _get_context(text, m.start(), m.end())
-        _add(IOCType.URL, value, ctx)
+    if has_url:
+        for m in URL_RE.finditer(text):
+            value = m.group().rstrip(".,;:)")
+            ctx = _get_context(text, m.start(), m.end())
+            _add(IOCType.URL, value, ctx)
 
     # Domains (skip if part of already-extracted URL)
     extracted_urls = {ioc.value for ioc in iocs if ioc.type == IOCType.URL}
@@ -192,3 +221,73 @@ def extract_iocs(text: str) -> list[IOC]:
 
     logger.info("Extracted %d IOCs from text (%d chars)", len(iocs), len(text))
     return iocs
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Lazy-create the shared worker pool for batched extraction."""
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                # spawn, not the Linux default fork: the server process already
+                # runs asyncio.to_thread workers, and forking a threaded
+                # process can deadlock the child on a lock held mid-fork
+                _POOL = ProcessPoolExecutor(
+                    max_workers=os.cpu_count(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _POOL
+
+
+def shutdown_pool() -> None:
+    """Stop the batched-extraction worker processes, if any were started."""
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+        logger.info("Shut down IOC extraction worker pool")
+
+
+def split_text(text: str, size: int = CHUNK_CHARS) -> list[str]:
+    """Split text into chunks of at most `size` chars, preferring sentence ends.
+
+    A chunk is cut after the last newline or sentence-ending punctuation in
+    its second half, so IOCs and their context are rarely split; if there is
+    none, it is cut hard at `size`.
+    """
+    chunks: list[str] = []
+    start = 0
+    while len(text) - start > size:
+        end = start + size
+        cut = max(text.rfind(sep, start + size // 2, end) for sep in ("\n", ". ", "! ", "? "))
+        if cut != -1:
+            end = cut + 1
+        chunks.append(text[start:end])
+        start = end
+    chunks.append(text[start:])
+    return chunks
+
+
+def extract_iocs_batched(chunks: Iterable[str]) -> list[IOC]:
+    """
+    Extract and deduplicate IOCs from several chunks of text.
+
+    Chunks are scanned in worker processes when their combined length reaches
+    PARALLEL_MIN_CHARS, and inline otherwise. Results are merged in chunk
+    order, keeping the first occurrence of each (type, value).
+
+    This blocks until every chunk is scanned; async callers should run it
+    via asyncio.to_thread.
+    """
+    chunks = [c for c in chunks if c]
+    if len(chunks) > 1 and sum(map(len, chunks)) >= PARALLEL_MIN_CHARS:
+        results = _get_pool().map(extract_iocs, chunks)
+    else:
+        results = map(extract_iocs, chunks)
+
+    merged: dict[tuple[str, str], IOC] = {}
+    for chunk_iocs in results:
+        for ioc in chunk_iocs:
+            merged.setdefault((ioc.type, ioc.value), ioc)
+    return list(merged.values())
@@ -5,48 +5,81 @@ from __future__ import annotations
 import os
 import re
 import logging
+from functools import lru_cache
 from typing import Optional
 
 import httpx
+import orjson
 
 from models import SearchResult
+from research.cache import TTLCache
+from research.http_client import RateLimiter, get_client, send_with_retry
 
 logger = logging.getLogger(__name__)
 
 BRAVE_SEARCH_URL = "https://api.search.brave.com/res/v1/web/search"
 
-# Patterns that indicate cyber-specific topics
-APT_PATTERN = re.compile(r"\bAPT\d+\b", re.IGNORECASE)
-CVE_PATTERN = re.compile(r"\bCVE-\d{4}-\d{4,}\b", re.IGNORECASE)
-THREAT_KEYWORDS = {"malware", "ransomware", "phishing", "exploit", "vulnerability", "campaign"}
-
-
+# Repeat searches for the same topic are common in the UI; serve them from
+# memory for a while instead of spending another rate-limited API call.
+SEARCH_CACHE_SIZE = 256
+SEARCH_CACHE_TTL = 600.0
+_search_cache = TTLCache(maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
+
+# Brave's free plan allows 1 request/second; pace calls up front instead of
+# bursting into 429s when research runs overlap
+BRAVE_MAX_RPS = float(os.environ.get("BRAVE_MAX_RPS", "1"))
+_brave_limiter = RateLimiter(max_rate=BRAVE_MAX_RPS, time_period=1.0)
+
+# Cues that indicate cyber-specific topics, classified in a single regex pass.
+# When a query matches several groups, apt wins over cve, and cve over threat.
+QUERY_CLASSIFIER = re.compile(
+    r"(?P<apt>\bAPT\d+\b|fancy bear|cozy bear|sandworm|lazarus|volt typhoon)"
+    r"|(?P<cve>\bCVE-\d{4}-\d{4,}\b)"
+    r"|(?P<threat>malware|ransomware|phishing|exploit|vulnerability|campaign)",
+    re.IGNORECASE,
+)
+
+QUERY_ENRICHMENT = {
+    # APT groups: add actor context terms
+    "apt": "threat actor MITRE ATT&CK campaign",
+    # CVEs: add exploit context
+    "cve": "exploit vulnerability IOC remediation",
+    # Common threat types
+    "threat": "threat intelligence IOC MITRE",
+}
+
+# Default enrichment for generic topics
+DEFAULT_ENRICHMENT = "cyber threat intelligence"
+
+
+@lru_cache(maxsize=1024)
 def _enhance_query(query: str) -> str:
     """Add cyber-specific search terms to improve results."""
-    lower = query.lower()
-    additions: list[str] = []
+    kinds: set[str] = set()
+    for m in QUERY_CLASSIFIER.finditer(query):
+        kinds.add(m.lastgroup)
+        if m.lastgroup == "apt":
+            break
 
-    # If it looks like an APT group, add context terms
-    if APT_PATTERN.search(query) or any(
-        kw in lower for kw in ("fancy bear", "cozy bear", "sandworm", "lazarus", "volt typhoon")
-    ):
-        additions.append("threat actor MITRE ATT&CK campaign")
+    addition = DEFAULT_ENRICHMENT
+    for kind in ("apt", "cve", "threat"):
+        if kind in kinds:
+            addition = QUERY_ENRICHMENT[kind]
+            break
 
-    # If it's a CVE, add exploit context
-    elif CVE_PATTERN.search(query):
-        additions.append("exploit vulnerability IOC remediation")
+    return f"{query} {addition}"
 
-    # If it mentions common threat types, enrich
-    elif any(kw in lower for kw in THREAT_KEYWORDS):
-        additions.append("threat intelligence IOC MITRE")
 
-    # Default enrichment for generic topics
-    else:
-        additions.append("cyber threat intelligence")
+def _search_cache_key(query: str, count: int, key: str) -> tuple[str, int, int]:
+    # Keyed on the API key too, so an invalid key never rides on another
+    # caller's cached results
+    return query, count, hash(key)
 
-    enhanced = f"{query} {' '.join(additions)}"
-    logger.info("Enhanced query: %s", enhanced)
-    return enhanced
+
+def is_search_cached(query: str, count: int = 10, api_key: Optional[str] = None) -> bool:
+    """Whether search_brave would answer these arguments from its cache."""
+    key = api_key or os.environ.get("BRAVE_API_KEY")
+    return bool(key) and _search_cache.get(_search_cache_key(query, count, key)) is not None
 
 
 async def search_brave(
@@ -75,7 +108,14 @@ async def search_brave(
             "Brave Search API key required. Set BRAVE_API_KEY env var or pass via settings."
         )
 
+    cache_key = _search_cache_key(query, count, key)
+    cached = _search_cache.get(cache_key)
+    if cached is not None:
+        logger.info("Brave Search cache hit for: %s", query)
+        return [r.model_copy() for r in cached]
+
     enhanced_query = _enhance_query(query)
+    logger.info("Enhanced query: %s", enhanced_query)
 
     headers = {
         "Accept": "application/json",
@@ -88,42 +128,55 @@ async def search_brave(
         "count": min(count, 20),
         "text_decorations": False,
         "search_lang": "en",
+        # Only web results are used; skip news/videos/discussions/FAQ/infobox
+        # so the response is smaller to transfer and parse
+        "result_filter": "web",
     }
 
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        try:
-            response = await client.get(
+    client = get_client()
+
+    async def _send() -> httpx.Response:
+        async with _brave_limiter:
+            return await client.get(
                 BRAVE_SEARCH_URL,
                 headers=headers,
                 params=params,
+                timeout=15.0,
             )
-            response.raise_for_status()
-        except httpx.TimeoutException:
-            logger.error("Brave Search timed out for query: %s", query)
-            raise ValueError("Search request timed out. Please try again.")
-        except httpx.HTTPStatusError as e:
-            status = e.response.status_code
-            if status == 401:
-                raise ValueError("Invalid Brave Search API key.")
-            elif status == 429:
-                raise ValueError("Brave Search rate limit exceeded. Try again later.")
-            else:
-                logger.error("Brave Search HTTP error %d: %s", status, e.response.text)
-                raise ValueError(f"Search failed with status {status}.")
-
-    data = response.json()
+
+    try:
+        response = await send_with_retry(_send, label="Brave Search")
+        response.raise_for_status()
+    except httpx.TimeoutException:
+        logger.error("Brave Search timed out for query: %s", query)
+        raise ValueError("Search request timed out. Please try again.")
+    except httpx.HTTPStatusError as e:
+        status = e.response.status_code
+        if status == 401:
+            raise ValueError("Invalid Brave Search API key.")
+        elif status == 429:
+            raise ValueError("Brave Search rate limit exceeded. Try again later.")
+        else:
+            logger.error("Brave Search HTTP error %d: %.500s", status, e.response.text)
+            raise ValueError(f"Search failed with status {status}.")
+
+    data = orjson.loads(response.content)
     web_results = data.get("web", {}).get("results", [])
 
-    results: list[SearchResult] = []
-    for item in web_results[:count]:
-        results.append(
-            SearchResult(
-                title=item.get("title", ""),
-                url=item.get("url", ""),
-                snippet=item.get("description", ""),
-                published_date=item.get("page_age", None),
-            )
+    # Brave omits keys such as page_age per result, so .get() with defaults
+    # is required rather than a strict itemgetter unpack
+    results = [
+        SearchResult(
+            title=item.get("title", ""),
+            url=item.get("url", ""),
+            snippet=item.get("description", ""),
+            published_date=item.get("page_age"),
         )
+        for item in web_results[:count]
+    ]
 
     logger.info("Brave Search returned %d results for: %s", len(results), query)
+    # Callers may mutate the results, so the cache keeps its own copies
+    if results:
+        _search_cache.set(cache_key, [r.model_copy() for r in results])
     return results
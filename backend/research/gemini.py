@@ -2,12 +2,16 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
+import hashlib
 import os
 import logging
+from datetime import datetime, timezone
 from typing import Optional
 
 import httpx
+import orjson
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 
 from models import (
     SearchResult,
@@ -19,32 +23,59 @@ from models import (
     AttackTechnique,
     Evidence,
 )
+from report.ioc_extractor import extract_iocs
+from research.cache import TTLCache
+from research.http_client import get_client, send_with_retry
+from research.llm_json import extract_balanced_json
+
+__all__ = ["synthesize_gemini", "synthesize_gemini_batch", "warmup_gemini_client"]
 
 logger = logging.getLogger(__name__)
 
+GEMINI_HOST_URL = "https://generativelanguage.googleapis.com/"
 GEMINI_API_URL = (
-    "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+    "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:streamGenerateContent"
 )
 
+# Topics packed into one request by synthesize_gemini_batch; bounded by the
+# 8192-token output cap, since every report comes back in the same response
+GEMINI_BATCH_SIZE = int(os.environ.get("GEMINI_BATCH_SIZE", "3"))
+
+# Caps in-flight Gemini requests across all callers to stay inside the
+# key's per-minute quota; only the HTTP exchange holds a slot
+GEMINI_MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", "8"))
+_GEMINI_SEM = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+
+# Re-running a topic over the same search results is common in the UI; a
+# cache hit skips the multi-second synthesis round-trip and its quota.
+SYNTHESIS_CACHE_SIZE = 512
+SYNTHESIS_CACHE_TTL = 600.0
+_synthesis_cache = TTLCache(maxsize=SYNTHESIS_CACHE_SIZE, ttl=SYNTHESIS_CACHE_TTL)
 
-def _build_prompt(topic: str, search_results: list[SearchResult]) -> str:
-    """Build the structured synthesis prompt."""
-    sources_text = ""
-    for i, result in enumerate(search_results):
-        sources_text += f"\n[{i + 1}] {result.title}\n    URL: {result.url}\n    Snippet: {result.snippet}\n"
 
-    return f"""You are a senior cyber threat intelligence analyst producing a BLUF-format intelligence report.
+def _synthesis_cache_key(
+    topic: str,
+    search_results: list[SearchResult],
+    api_key: str,
+    snippet_chars: Optional[int],
+) -> tuple[str, int, Optional[int]]:
+    """Fingerprint of the prompt inputs; result order matters for [N] citations."""
+    digest = hashlib.blake2b(topic.encode(), digest_size=16)
+    for sr in search_results:
+        digest.update(b"\x00" + sr.url.encode() + b"\x00" + sr.snippet.encode())
+    return digest.hexdigest(), hash(api_key), snippet_chars
 
-TOPIC: {topic}
 
-SEARCH RESULTS:
-{sources_text}
+# Everything except the topic and search results is identical on every call.
+# Sending it as the system instruction keeps the request prefix stable, so
+# Gemini's implicit prefix caching can skip re-processing it.
+SYSTEM_INSTRUCTION = """You are a senior cyber threat intelligence analyst producing a BLUF-format intelligence report.
 
 Produce a comprehensive intelligence report in the following JSON structure. Cite sources by their index number (e.g., [1], [2]).
 
-{{
+{
   "bluf": "Bottom Line Up Front — 2-3 sentence executive summary of the threat",
-  "threat_actor": {{
+  "threat_actor": {
     "name": "Primary threat actor name",
     "aliases": ["alias1", "alias2"],
     "attribution": "Nation-state or group attribution",
@@ -52,91 +83,91 @@ Produce a comprehensive intelligence report in the following JSON structure. Cit
     "last_active": "YYYY or YYYY-MM",
     "tooling": ["tool1", "tool2"],
     "notes": "Additional context"
-  }},
+  },
   "sections": [
-    {{
+    {
       "id": "campaign-overview",
       "title": "Campaign Overview",
       "content": "Detailed overview...",
       "citations": ["[1]", "[3]"]
-    }},
-    {{
+    },
+    {
       "id": "ttps",
       "title": "Tactics, Techniques & Procedures",
       "content": "TTP analysis...",
       "citations": ["[2]"]
-    }},
-    {{
+    },
+    {
       "id": "victimology",
       "title": "Victimology",
       "content": "Target sectors, regions, organizations...",
       "citations": []
-    }},
-    {{
+    },
+    {
       "id": "infrastructure",
       "title": "Infrastructure",
       "content": "C2, hosting, domains...",
       "citations": []
-    }},
-    {{
+    },
+    {
       "id": "timeline",
       "title": "Timeline",
       "content": "Chronological sequence of events...",
       "citations": []
-    }},
-    {{
+    },
+    {
       "id": "attribution",
       "title": "Attribution Assessment",
       "content": "Evidence-based attribution analysis...",
       "citations": []
-    }},
-    {{
+    },
+    {
       "id": "impact",
       "title": "Impact Assessment",
       "content": "Business, operational, and strategic impact...",
       "citations": []
-    }},
-    {{
+    },
+    {
       "id": "remediation",
       "title": "Remediation Guidance",
       "content": "Actionable mitigation steps...",
       "citations": []
-    }},
-    {{
+    },
+    {
       "id": "outlook",
       "title": "Outlook",
       "content": "Future threat projections...",
       "citations": []
-    }},
-    {{
+    },
+    {
       "id": "appendix",
       "title": "Appendix",
       "content": "Additional technical details...",
       "citations": []
-    }}
+    }
   ],
   "iocs": [
-    {{
+    {
       "type": "ipv4|ipv6|domain|url|md5|sha1|sha256|cve",
       "value": "the indicator value",
       "context": "where/how this IOC was observed"
-    }}
+    }
   ],
   "attack_techniques": [
-    {{
+    {
       "technique_id": "T1059.001",
       "name": "PowerShell",
       "tactic": "Execution",
       "description": "How this technique was used",
       "evidence": [
-        {{
+        {
           "quote": "relevant quote from source",
           "source": "[1]"
-        }}
+        }
       ]
-    }}
+    }
   ]
-}}
+}
 
 Rules:
 1. Extract ALL IOCs mentioned in the sources (IPs, domains, hashes, CVEs, URLs)
@@ -146,65 +177,105 @@ Rules:
 5. Be precise and analytical — this is for security professionals
 6. Return ONLY valid JSON, no markdown formatting or code blocks"""
 
+# Request pieces that never change, built once instead of per synthesis
+_SYSTEM_INSTRUCTION_CONTENT = {"parts": [{"text": SYSTEM_INSTRUCTION}]}
+_GENERATION_CONFIG = {
+    "temperature": 0.3,
+    "topP": 0.8,
+    "maxOutputTokens": 8192,
+    "responseMimeType": "application/json",
+}
+# Search snippets past this length add input tokens without adding much the
+# model uses; Brave descriptions rarely reach it
+PROMPT_SNIPPET_CHARS = 400
+
+# Regex-detected IOCs listed in the prompt as hints, at most
+MAX_IOC_HINTS = 50
+
+_PROMPT_TAIL = "\n\nProduce the intelligence report for this topic in the JSON structure from your instructions."
+_BATCH_PROMPT_TAIL = (
+    '\n\nProduce one intelligence report per topic above, in the JSON structure from your '
+    'instructions, and return them in order as {"reports": [...]}. Cite each report\'s '
+    "sources by the index numbers under its own topic."
+)
+
+
+def _build_prompt(
+    topic: str,
+    search_results: list[SearchResult],
+    snippet_chars: Optional[int] = PROMPT_SNIPPET_CHARS,
+    known_iocs: Optional[list[IOC]] = None,
+) -> str:
+    """Build the per-call part of the synthesis prompt: topic and search results."""
+    return _topic_block(topic, search_results, snippet_chars, known_iocs) + _PROMPT_TAIL
 
-def _parse_response(raw_text: str, topic: str, search_results: list[SearchResult]) -> dict:
-    """Parse the Gemini response JSON, handling common formatting issues.
 
-    Strategies (tried in order):
-    1. Direct JSON parse
-    2. Strip markdown code fences and retry
-    3. Strip trailing commentary after last '}' and retry
-    4. Attempt partial JSON recovery (find outermost { ... })
-    5. Fall back to structured raw-text sections with parse-fallback markers
+def _topic_block(
+    topic: str,
+    search_results: list[SearchResult],
+    snippet_chars: Optional[int] = PROMPT_SNIPPET_CHARS,
+    known_iocs: Optional[list[IOC]] = None,
+) -> str:
+    """Render one topic with its numbered search results.
+
+    Snippets are cut to `snippet_chars` (None keeps them whole), and a
+    snippet repeated verbatim by a later result is referenced rather than
+    resent. Every result keeps its index so [N] citations stay aligned.
+    `known_iocs` are listed as pre-detected indicators for the model to
+    confirm rather than find.
     """
-    text = raw_text.strip()
+    seen: dict[str, int] = {}
+    entries: list[str] = []
+    for i, result in enumerate(search_results, start=1):
+        snippet = (result.snippet or "")[:snippet_chars]
+        first = seen.setdefault(snippet, i) if snippet else i
+        if first != i:
+            snippet = f"(same as [{first}])"
+        entries.append(f"\n[{i}] {result.title}\n    URL: {result.url}\n    Snippet: {snippet}\n")
+    sources_text = "".join(entries)
+
+    hints = ""
+    if known_iocs:
+        listed = "".join(f"\n- {ioc.type.value}: {ioc.value}" for ioc in known_iocs[:MAX_IOC_HINTS])
+        hints = (
+            "\n\nALREADY-DETECTED IOCs (regex matches in the full search results; "
+            "include the genuine ones with context and add any that were missed):"
+            f"{listed}"
+        )
 
-    # Strategy 1: Direct parse
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        pass
+    return f"TOPIC: {topic}\n\nSEARCH RESULTS:\n{sources_text}{hints}"
 
-    # Strategy 2: Strip markdown code fences
-    cleaned = text
-    if cleaned.startswith("```"):
-        try:
-            first_newline = cleaned.index("\n")
-            cleaned = cleaned[first_newline + 1:]
-        except ValueError:
-            cleaned = cleaned[3:]
-        if cleaned.endswith("```"):
-            cleaned = cleaned[:-3]
-        cleaned = cleaned.strip()
-        try:
-            return json.loads(cleaned)
-        except json.JSONDecodeError:
-            pass
 
-    # Strategy 3: Strip trailing commentary after last '}'
-    last_brace = cleaned.rfind("}")
-    if last_brace != -1:
-        trimmed = cleaned[: last_brace + 1].strip()
+def _parse_response(raw_text: str, topic: str, search_results: list[SearchResult]) -> dict:
+    """Parse the Gemini response JSON, handling common formatting issues.
+
+    A bare object is parsed directly. Otherwise the first balanced {...}
+    object is extracted in a single scan (which also strips code fences and
+    trailing commentary and closes truncated output) and parsed once. If
+    that fails, the response falls back to structured raw-text sections
+    with parse-fallback markers.
+    """
+    # responseMimeType=application/json usually yields a bare object; parse it
+    # straight away and only scan when it is wrapped or damaged
+    text = raw_text.strip()
+    if text[:1] == "{" and text[-1:] == "}":
         try:
-            return json.loads(trimmed)
-        except json.JSONDecodeError:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
             pass
 
-    # Strategy 4: Extract outermost { ... } block
-    first_brace = cleaned.find("{")
-    if first_brace != -1 and last_brace > first_brace:
-        extracted = cleaned[first_brace: last_brace + 1]
+    candidate = extract_balanced_json(text)
+    if candidate is not None:
         try:
-            return json.loads(extracted)
-        except json.JSONDecodeError as e:
+            return orjson.loads(candidate)
+        except orjson.JSONDecodeError as e:
             logger.warning(
-                "Gemini JSON parse failed after all recovery attempts: %s "
-                "(first 200 chars: %s)",
+                "Gemini JSON parse failed after recovery: %s (first 200 chars: %s)",
                 e,
-                extracted[:200],
+                candidate[:200],
             )
 
-    # Strategy 5: Structured fallback with parse-failure markers
+    # Structured fallback with parse-failure markers
     logger.error(
         "Gemini response could not be parsed as JSON. "
         "Falling back to raw-text sections. First 500 chars: %s",
@@ -254,79 +325,58 @@ def _parse_response(raw_text: str, topic: str, search_results: list[SearchResult
     }
 
 
-async def synthesize_gemini(
-    topic: str,
-    search_results: list[SearchResult],
-    api_key: Optional[str] = None,
-) -> ResearchBundle:
-    """
-    Synthesize search results into a structured research bundle using Gemini Flash.
+# ─── Response Schema ─────────────────────────────────────────────────────────
+# Lenient shape of the model's JSON output. Each list is decoded in a single
+# pydantic-core pass with defaults filled in, so the builders below read typed
+# attributes instead of chaining dict .get() calls.
 
-    Args:
-        topic: The research topic.
-        search_results: Results from Brave Search.
-        api_key: Gemini API key. Falls back to GEMINI_API_KEY env var.
 
-    Returns:
-        ResearchBundle with synthesized intelligence.
+class _GeminiIOC(BaseModel):
+    type: str = "domain"
+    value: str = ""
+    context: Optional[str] = None
 
-    Raises:
-        ValueError: If no API key or API errors.
-    """
-    key = api_key or os.environ.get("GEMINI_API_KEY")
-    if not key:
-        raise ValueError(
-            "Gemini API key required. Set GEMINI_API_KEY env var or pass via settings."
-        )
 
-    prompt = _build_prompt(topic, search_results)
+class _GeminiEvidence(BaseModel):
+    quote: str = ""
+    source: str = ""
 
-    payload = {
-        "contents": [{"parts": [{"text": prompt}]}],
-        "generationConfig": {
-            "temperature": 0.3,
-            "topP": 0.8,
-            "maxOutputTokens": 8192,
-            "responseMimeType": "application/json",
-        },
-    }
+    # The model sometimes cites a source as a bare number
+    model_config = {"coerce_numbers_to_str": True}
 
-    url = f"{GEMINI_API_URL}?key={key}"
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        try:
-            response = await client.post(url, json=payload)
-            response.raise_for_status()
-        except httpx.TimeoutException:
-            raise ValueError("Gemini synthesis timed out. The topic may be too complex for free tier.")
-        except httpx.HTTPStatusError as e:
-            status = e.response.status_code
-            if status == 400:
-                raise ValueError("Invalid request to Gemini API. Check your API key.")
-            elif status == 429:
-                raise ValueError("Gemini rate limit exceeded. Try again later.")
-            elif status == 403:
-                raise ValueError("Gemini API key unauthorized. Check permissions.")
-            else:
-                logger.error("Gemini HTTP error %d: %s", status, e.response.text)
-                raise ValueError(f"Gemini synthesis failed with status {status}.")
-
-    response_data = response.json()
-
-    # Extract text from Gemini response
-    try:
-        raw_text = response_data["candidates"][0]["content"]["parts"][0]["text"]
-    except (KeyError, IndexError) as e:
-        logger.error("Unexpected Gemini response structure: %s", e)
-        raise ValueError("Failed to extract content from Gemini response.")
+class _GeminiTechnique(BaseModel):
+    technique_id: str = ""
+    name: str = ""
+    tactic: str = ""
+    description: str = ""
+    evidence: list[_GeminiEvidence] = Field(default_factory=list)
 
-    parsed = _parse_response(raw_text, topic, search_results)
 
-    # Build sources list from search results
-    from datetime import datetime, timezone
+_VALID_IOC_TYPES = frozenset(t.value for t in IOCType)
+_GEMINI_IOCS = TypeAdapter(list[_GeminiIOC])
+_GEMINI_TECHNIQUES = TypeAdapter(list[_GeminiTechnique])
+
 
-    now_iso = datetime.now(timezone.utc).isoformat()
-    sources = [
+def _decode_items(adapter: TypeAdapter, item_model: type[BaseModel], raw_items, label: str) -> list:
+    """Decode a list in one pass; if that fails, keep the items that validate."""
+    try:
+        return adapter.validate_python(raw_items)
+    except ValidationError:
+        pass
+    items = []
+    for raw in raw_items if isinstance(raw_items, list) else ():
+        try:
+            items.append(item_model.model_validate(raw))
+        except ValidationError:
+            logger.warning("Skipping malformed %s: %.200s", label, raw)
+    return items
+
+
+def _build_sources(search_results: list[SearchResult]) -> list[ReportSource]:
+    """Convert search results to bibliography entries."""
+    now_iso = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    return [
         ReportSource(
             title=sr.title,
             url=sr.url,
@@ -336,40 +386,155 @@ async def synthesize_gemini(
         for sr in search_results
     ]
 
-    # Parse IOCs from response
-    raw_iocs = parsed.get("iocs", [])
+
+def _parse_iocs(parsed: dict) -> list[IOC]:
+    """Build IOC models from the parsed response, skipping unknown types."""
     iocs: list[IOC] = []
-    for raw_ioc in raw_iocs:
-        try:
-            ioc_type = IOCType(raw_ioc.get("type", "domain"))
-            iocs.append(
-                IOC(
-                    type=ioc_type,
-                    value=raw_ioc.get("value", ""),
-                    context=raw_ioc.get("context"),
-                    sources=[],
-                )
-            )
-        except ValueError:
-            logger.warning("Unknown IOC type: %s", raw_ioc.get("type"))
-
-    # Parse ATT&CK techniques
-    raw_techniques = parsed.get("attack_techniques", [])
-    techniques: list[AttackTechnique] = []
-    for raw_tech in raw_techniques:
-        evidence_list = [
-            Evidence(quote=ev.get("quote", ""), source=ev.get("source", ""))
-            for ev in raw_tech.get("evidence", [])
-        ]
-        techniques.append(
-            AttackTechnique(
-                technique_id=raw_tech.get("technique_id", ""),
-                name=raw_tech.get("name", ""),
-                tactic=raw_tech.get("tactic", ""),
-                description=raw_tech.get("description", ""),
-                evidence=evidence_list,
-            )
+    for raw in _decode_items(_GEMINI_IOCS, _GeminiIOC, parsed.get("iocs", []), "IOC"):
+        if raw.type not in _VALID_IOC_TYPES:
+            logger.warning("Unknown IOC type: %s", raw.type)
+            continue
+        # Fields were validated by the decode; skip a second validation pass
+        iocs.append(
+            IOC.model_construct(type=IOCType(raw.type), value=raw.value, context=raw.context, sources=[])
+        )
+    return iocs
+
+
+def _parse_techniques(parsed: dict) -> list[AttackTechnique]:
+    """Build ATT&CK technique models from the parsed response."""
+    raw_techniques = _decode_items(
+        _GEMINI_TECHNIQUES, _GeminiTechnique, parsed.get("attack_techniques", []), "technique",
+    )
+    return [
+        AttackTechnique.model_construct(
+            technique_id=raw.technique_id,
+            name=raw.name,
+            tactic=raw.tactic,
+            description=raw.description,
+            evidence=[Evidence.model_construct(quote=ev.quote, source=ev.source) for ev in raw.evidence],
+        )
+        for raw in raw_techniques
+    ]
+
+
+async def warmup_gemini_client() -> None:
+    """
+    Open a pooled connection to the Gemini API host ahead of synthesis.
+
+    Only the TCP + TLS handshake matters, so the response is discarded.
+    Failures are logged and otherwise ignored; synthesis will simply
+    connect on its own.
+    """
+    try:
+        await get_client().head(GEMINI_HOST_URL, timeout=5.0)
+    except httpx.HTTPError as e:
+        logger.warning("Gemini connection warm-up failed: %s", e)
+
+
+async def _read_stream_text(response: httpx.Response) -> tuple[str, bool]:
+    """
+    Concatenate the candidate text from a streamGenerateContent SSE body.
+
+    Each event carries the next slice of the model output, so chunks are
+    decoded as they arrive rather than after the whole body is buffered.
+    Returns the text and whether the output was cut off at maxOutputTokens.
+    """
+    chunks: list[str] = []
+    finish_reason = None
+    try:
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            event = orjson.loads(line[5:])
+            candidate = event["candidates"][0]
+            finish_reason = candidate.get("finishReason", finish_reason)
+            for part in candidate.get("content", {}).get("parts", ()):
+                chunks.append(part.get("text", ""))
+    except (KeyError, IndexError, orjson.JSONDecodeError) as e:
+        logger.error("Unexpected Gemini response structure: %s", e)
+        raise ValueError("Failed to extract content from Gemini response.")
+
+    if not chunks:
+        logger.error("Gemini stream ended without any content")
+        raise ValueError("Failed to extract content from Gemini response.")
+    return "".join(chunks), finish_reason == "MAX_TOKENS"
+
+
+def _resolve_key(api_key: Optional[str]) -> str:
+    key = api_key or os.environ.get("GEMINI_API_KEY")
+    if not key:
+        raise ValueError(
+            "Gemini API key required. Set GEMINI_API_KEY env var or pass via settings."
         )
+    return key
+
+
+async def _detect_iocs(search_results: list[SearchResult]) -> list[IOC]:
+    """Regex IOCs in the snippets, found off the event loop."""
+    return await asyncio.to_thread(
+        extract_iocs, "\n".join(sr.snippet for sr in search_results if sr.snippet),
+    )
+
+
+async def _generate(prompt: str, key: str) -> tuple[str, bool]:
+    """Run one generateContent exchange; return the model's text and whether it was truncated."""
+    payload = {
+        "systemInstruction": _SYSTEM_INSTRUCTION_CONTENT,
+        "contents": [{"parts": [{"text": prompt}]}],
+        "generationConfig": _GENERATION_CONFIG,
+    }
+
+    url = f"{GEMINI_API_URL}?alt=sse&key={key}"
+
+    client = get_client()
+    request = client.build_request("POST", url, json=payload, timeout=60.0)
+
+    async def _send() -> httpx.Response:
+        return await client.send(request, stream=True)
+
+    try:
+        # Transient 429/503s and timeouts back off and retry instead of
+        # failing the whole research run
+        async with _GEMINI_SEM:
+            response = await send_with_retry(
+                _send, label="Gemini", base_delay=1.0, retry_timeouts=True,
+            )
+            try:
+                if response.is_error:
+                    await response.aread()
+                response.raise_for_status()
+                return await _read_stream_text(response)
+            finally:
+                await response.aclose()
+    except httpx.TimeoutException:
+        raise ValueError("Gemini synthesis timed out. The topic may be too complex for free tier.")
+    except httpx.HTTPStatusError as e:
+        status = e.response.status_code
+        if status == 400:
+            raise ValueError("Invalid request to Gemini API. Check your API key.")
+        elif status == 429:
+            raise ValueError("Gemini rate limit exceeded. Try again later.")
+        elif status == 403:
+            raise ValueError("Gemini API key unauthorized. Check permissions.")
+        else:
+            logger.error("Gemini HTTP error %d: %.500s", status, e.response.text)
+            raise ValueError(f"Gemini synthesis failed with status {status}.")
+
+
+async def _build_bundle(
+    topic: str,
+    search_results: list[SearchResult],
+    raw_text: str,
+    parsed: dict,
+) -> ResearchBundle:
+    """Assemble a ResearchBundle from one parsed report."""
+    # Building the models is pure CPU; keep the loop free for other syntheses
+    sources, iocs, techniques = await asyncio.gather(
+        asyncio.to_thread(_build_sources, search_results),
+        asyncio.to_thread(_parse_iocs, parsed),
+        asyncio.to_thread(_parse_techniques, parsed),
+    )
 
     return ResearchBundle(
         topic=topic,
@@ -387,3 +552,144 @@ async def synthesize_gemini(
             "synthesisModel": "gemini-2.0-flash",
         },
     )
+
+
+def _cache_bundle(
+    cache_key: tuple, parsed: dict, bundle: ResearchBundle, truncated: bool = False,
+) -> ResearchBundle:
+    """Cache a finished bundle and return a caller-owned copy."""
+    # Don't pin a parse-fallback or truncated (bracket-repaired) result; the
+    # next call may come back whole
+    if not truncated and not str(parsed.get("bluf", "")).startswith("[PARSE FALLBACK]"):
+        _synthesis_cache.set(cache_key, bundle)
+    return bundle.model_copy(deep=True)
+
+
+def _from_cache(cached: ResearchBundle) -> ResearchBundle:
+    """Return a caller-owned copy of a cached bundle, flagged as a cache hit."""
+    # Callers overwrite metadata, so never hand out the cached instance
+    bundle = cached.model_copy(deep=True)
+    bundle.metadata.cache_hit = True
+    return bundle
+
+
+async def synthesize_gemini(
+    topic: str,
+    search_results: list[SearchResult],
+    api_key: Optional[str] = None,
+    snippet_chars: Optional[int] = PROMPT_SNIPPET_CHARS,
+) -> ResearchBundle:
+    """
+    Synthesize search results into a structured research bundle using Gemini Flash.
+
+    Args:
+        topic: The research topic.
+        search_results: Results from Brave Search.
+        api_key: Gemini API key. Falls back to GEMINI_API_KEY env var.
+        snippet_chars: Per-result snippet budget in the prompt; None sends
+            full snippets (used for extracted user sources).
+
+    Returns:
+        ResearchBundle with synthesized intelligence.
+
+    Raises:
+        ValueError: If no API key or API errors.
+    """
+    key = _resolve_key(api_key)
+
+    cache_key = _synthesis_cache_key(topic, search_results, key, snippet_chars)
+    cached = _synthesis_cache.get(cache_key)
+    if cached is not None:
+        logger.info("Gemini synthesis cache hit for: %s", topic)
+        return _from_cache(cached)
+    logger.info("Gemini synthesis cache miss for: %s", topic)
+
+    # Grep-able indicators are found locally so the model only has to
+    # confirm and contextualize them
+    known_iocs = await _detect_iocs(search_results)
+    prompt = _build_prompt(topic, search_results, snippet_chars, known_iocs)
+
+    raw_text, truncated = await _generate(prompt, key)
+    if truncated:
+        logger.warning("Gemini output for %s hit the token cap; using the repaired partial report", topic)
+    parsed = _parse_response(raw_text, topic, search_results)
+    bundle = await _build_bundle(topic, search_results, raw_text, parsed)
+    return _cache_bundle(cache_key, parsed, bundle, truncated)
+
+
+async def synthesize_gemini_batch(
+    topics: list[tuple[str, list[SearchResult]]],
+    api_key: Optional[str] = None,
+    snippet_chars: Optional[int] = PROMPT_SNIPPET_CHARS,
+) -> list[ResearchBundle]:
+    """
+    Synthesize several topics, packing up to GEMINI_BATCH_SIZE into each request.
+
+    Cached topics are served without a call. Each group shares one request
+    (one prompt prefix, one round-trip) and the groups run concurrently. A
+    report missing from a batched response, or the one cut off when the
+    output hit the token cap, is synthesized on its own and not cached
+    from the batch.
+
+    Args:
+        topics: (topic, search results) pairs.
+        api_key: Gemini API key. Falls back to GEMINI_API_KEY env var.
+        snippet_chars: Per-result snippet budget, as for synthesize_gemini.
+
+    Returns:
+        One ResearchBundle per input pair, in input order.
+
+    Raises:
+        ValueError: If no API key or API errors.
+    """
+    key = _resolve_key(api_key)
+
+    bundles: list[Optional[ResearchBundle]] = [None] * len(topics)
+    pending: list[tuple[int, tuple]] = []
+    for i, (topic, search_results) in enumerate(topics):
+        cache_key = _synthesis_cache_key(topic, search_results, key, snippet_chars)
+        cached = _synthesis_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Gemini synthesis cache hit for: %s", topic)
+            bundles[i] = _from_cache(cached)
+        else:
+            pending.append((i, cache_key))
+
+    async def _run_group(group: list[tuple[int, tuple]]) -> None:
+        if len(group) == 1:
+            i, _ = group[0]
+            bundles[i] = await synthesize_gemini(*topics[i], key, snippet_chars)
+            return
+
+        known = await asyncio.gather(*(_detect_iocs(topics[i][1]) for i, _ in group))
+        blocks = [
+            f"=== REPORT {n} ===\n" + _topic_block(*topics[i], snippet_chars, known_iocs)
+            for n, ((i, _), known_iocs) in enumerate(zip(group, known), start=1)
+        ]
+        logger.info("Gemini batch synthesis of %d topics", len(group))
+        raw_text, truncated = await _generate("\n\n".join(blocks) + _BATCH_PROMPT_TAIL, key)
+        reports = _parse_response(raw_text, "batch", []).get("reports")
+        if not isinstance(reports, list):
+            reports = []
+        elif truncated:
+            # The scanner closes whatever was open at the cut, so the last
+            # report parses as a dict but holds only part of its content.
+            # Reports before it were closed by the model and are complete.
+            reports = reports[:-1]
+
+        for n, (i, cache_key) in enumerate(group):
+            topic, search_results = topics[i]
+            report = reports[n] if n < len(reports) else None
+            if not isinstance(report, dict):
+                logger.warning("Gemini batch response has no report for %s; synthesizing alone", topic)
+                bundles[i] = await synthesize_gemini(topic, search_results, key, snippet_chars)
+                continue
+            report_text = orjson.dumps(report).decode()
+            bundle = await _build_bundle(topic, search_results, report_text, report)
+            bundles[i] = _cache_bundle(cache_key, report, bundle)
+
+    await asyncio.gather(*(
+        _run_group(pending[j:j + GEMINI_BATCH_SIZE])
+        for j in range(0, len(pending), GEMINI_BATCH_SIZE)
+    ))
+    return bundles
@@ -0,0 +1,215 @@
+"""Shared outbound HTTP client for research providers.
+
+A single AsyncClient is reused across requests so keep-alive connections to
+Brave, Gemini and Perplexity survive between research runs instead of paying
+a fresh TCP + TLS handshake on every call. HTTP/2 is enabled so concurrent
+calls to the same upstream multiplex over one connection. The FastAPI
+lifespan closes the client on shutdown.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import time
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Awaitable, Callable, Optional
+from urllib.request import getproxies
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 15.0
+MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+# Enough idle connections that concurrent Gemini syntheses rarely re-handshake
+MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", "32"))
+KEEPALIVE_EXPIRY = 30.0
+# Re-dial once when a connection attempt fails (reset, refused, DNS hiccup).
+# Only connect errors are retried, so requests are never sent twice.
+CONNECT_RETRIES = 1
+USER_AGENT = "CyberBRIEF/1.0 (Threat Intelligence Research)"
+
+# Transient upstream statuses worth retrying with backoff
+RETRY_STATUSES = frozenset({429, 503})
+
+_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+def _reject_all_cookies() -> CookieJar:
+    """A cookie jar that never stores anything.
+
+    The client is shared by every user's research runs and fetches arbitrary
+    user-submitted URLs, so a Set-Cookie from one fetch must never be replayed
+    on another (or accumulate without bound). No provider API needs cookies.
+    """
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+def _make_transport(proxy: Optional[str] = None) -> httpx.AsyncHTTPTransport:
+    """Build a pooled HTTP/2 transport, optionally routed through `proxy`.
+
+    http2 and limits are set here because a client given an explicit
+    transport ignores its own.
+    """
+    return httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        retries=CONNECT_RETRIES,
+        proxy=proxy,
+    )
+
+
+def _proxy_mounts() -> dict[str, Optional[httpx.AsyncHTTPTransport]]:
+    """Transport mounts for HTTP_PROXY / HTTPS_PROXY / ALL_PROXY / NO_PROXY.
+
+    Mirrors httpx's environment proxy rules: NO_PROXY hosts (and their
+    subdomains) are mounted as None so they go direct.
+    """
+    proxies = getproxies()
+    no_proxy = proxies.pop("no", "")
+    if no_proxy.strip() == "*":
+        return {}
+
+    mounts: dict[str, Optional[httpx.AsyncHTTPTransport]] = {}
+    for scheme in ("http", "https", "all"):
+        url = proxies.get(scheme)
+        if url:
+            if "://" not in url:
+                url = f"http://{url}"
+            mounts[f"{scheme}://"] = _make_transport(proxy=url)
+    if not mounts:
+        return {}
+
+    for host in filter(None, (h.strip() for h in no_proxy.split(","))):
+        if "://" in host:
+            mounts[host] = None
+        elif host == "localhost" or host[0].isdigit() or ":" in host:
+            mounts[f"all://{host}"] = None
+        else:
+            mounts[f"all://*{host.lstrip('.')}"] = None
+    return mounts
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the process-wide AsyncClient, creating it on first use.
+
+    Callers pass per-request timeouts; DEFAULT_TIMEOUT only applies when
+    they don't.
+    """
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        # An explicit transport turns off httpx's own HTTP(S)_PROXY handling,
+        # so proxy routes are mounted here with the same settings
+        _CLIENT = httpx.AsyncClient(
+            transport=_make_transport(),
+            mounts=_proxy_mounts(),
+            timeout=DEFAULT_TIMEOUT,
+            headers={"User-Agent": USER_AGENT},
+            cookies=_reject_all_cookies(),
+        )
+    return _CLIENT
+
+
+async def aclose_client() -> None:
+    """Close the shared client and its connection pool."""
+    global _CLIENT
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+        logger.info("Closed shared HTTP client")
+
+
+class RateLimiter:
+    """Async token bucket allowing `max_rate` acquisitions per `time_period` seconds.
+
+    Use as `async with limiter:` around an outbound call. Waiters queue in
+    arrival order behind an internal lock. The bucket holds at least one
+    token, so fractional rates (e.g. 0.5/s) allow one call every 2 seconds.
+    """
+
+    def __init__(self, max_rate: float, time_period: float = 1.0) -> None:
+        if max_rate <= 0 or time_period <= 0:
+            raise ValueError("RateLimiter max_rate and time_period must be positive")
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._capacity = max(1.0, max_rate)
+        self._level = 0.0
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                drained = (now - self._last) * self.max_rate / self.time_period
+                self._level = max(0.0, self._level - drained)
+                self._last = now
+                if self._level + 1 <= self._capacity:
+                    self._level += 1
+                    return
+                overflow = self._level + 1 - self._capacity
+                await asyncio.sleep(overflow * self.time_period / self.max_rate)
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+
+def _retry_delay(response: httpx.Response, attempt: int, base: float, cap: float) -> float:
+    """Backoff for the given attempt, honouring a numeric Retry-After header."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after and retry_after.isdigit():
+        return min(cap, float(retry_after))
+    return min(cap, base * 2 ** attempt) + random.uniform(0, base)
+
+
+async def send_with_retry(
+    send: Callable[[], Awaitable[httpx.Response]],
+    *,
+    label: str,
+    attempts: int = 3,
+    base_delay: float = 0.5,
+    max_delay: float = 8.0,
+    retry_statuses: frozenset[int] = RETRY_STATUSES,
+    retry_timeouts: bool = False,
+) -> httpx.Response:
+    """
+    Call `send` until it returns a non-retryable status or attempts run out.
+
+    Retries on `retry_statuses` with jittered exponential backoff, and on
+    httpx.TimeoutException when `retry_timeouts` is set. The final response
+    (or timeout) is passed through as-is, so callers keep their own
+    raise_for_status() and error mapping.
+    """
+    for attempt in range(attempts - 1):
+        try:
+            response = await send()
+        except httpx.TimeoutException as e:
+            if not retry_timeouts:
+                raise
+            delay = min(max_delay, base_delay * 2 ** attempt) + random.uniform(0, base_delay)
+            logger.warning(
+                "%s timed out (%s), retrying in %.1fs (attempt %d/%d)",
+                label, type(e).__name__, delay, attempt + 1, attempts,
+            )
+            await asyncio.sleep(delay)
+            continue
+        if response.status_code not in retry_statuses:
+            return response
+        delay = _retry_delay(response, attempt, base_delay, max_delay)
+        logger.warning(
+            "%s returned %d, retrying in %.1fs (attempt %d/%d)",
+            label, response.status_code, delay, attempt + 1, attempts,
+        )
+        await response.aclose()
+        await asyncio.sleep(delay)
+    return await send()
@@ -0,0 +1,50 @@
+"""Locate JSON objects in free-form LLM output."""
+
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+# Characters that matter for locating the JSON object; everything else is
+# skipped over in C by finditer
+_JSON_STRUCTURE_RE = re.compile(r'[\\"{}\[\]]')
+
+
+def extract_balanced_json(text: str, start: int = 0) -> Optional[str]:
+    """
+    Return the first balanced top-level JSON object in text, in one pass.
+
+    Scanning begins at `start`. Brackets inside string literals are ignored.
+    Leading prose or code fences and trailing commentary are dropped. If the
+    text ends mid-object (output truncated at the token limit), the open
+    string and brackets are closed so the completed part can still be parsed.
+    """
+    start = text.find("{", start)
+    if start == -1:
+        return None
+
+    closers: list[str] = []
+    in_string = False
+    skip_until = -1
+    for m in _JSON_STRUCTURE_RE.finditer(text, start):
+        i = m.start()
+        if i < skip_until:
+            continue  # escaped character
+        ch = m.group()
+        if in_string:
+            if ch == "\\":
+                skip_until = i + 2
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            closers.append("}")
+        elif ch == "[":
+            closers.append("]")
+        elif closers:
+            closers.pop()
+            if not closers:
+                return text[start:i + 1]
+
+    return text[start:] + ('"' if in_string else "") + "".join(reversed(closers))
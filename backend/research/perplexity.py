@@ -6,14 +6,20 @@ DEEP tier uses Sonar Deep Research (sonar-deep-research) for comprehensive analy
 
 from __future__ import annotations
 
-import json
+import asyncio
+import hashlib
+import ipaddress
 import os
 import logging
 import re
 import time
+from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
 
 import httpx
+import orjson
 
 from models import (
     ResearchBundle,
@@ -26,11 +32,41 @@ from models import (
     Evidence,
     ReportSource,
 )
+from research.cache import TTLCache
+from research.http_client import get_client, send_with_retry
+from research.llm_json import extract_balanced_json
+
+__all__ = [
+    "search_perplexity_sonar",
+    "deep_research_perplexity",
+    "PerplexityNotAvailable",
+    "canonical_url",
+]
 
 logger = logging.getLogger(__name__)
 
 PERPLEXITY_API_URL = "https://api.perplexity.ai/chat/completions"
 
+# Opening of a markdown code fence; the object itself is found by
+# extract_balanced_json rather than a lazy regex capture
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*", re.IGNORECASE)
+
+
+# Requests run at temperature 0.1, so a repeat topic gets essentially the same
+# report; serve it from memory instead of waiting minutes for the API again
+RESEARCH_CACHE_SIZE = 128
+RESEARCH_CACHE_TTL = 3600.0
+_research_cache = TTLCache(maxsize=RESEARCH_CACHE_SIZE, ttl=RESEARCH_CACHE_TTL)
+
+# Cap on in-flight Perplexity calls across all research runs. It is taken
+# around the HTTP exchange only, so cache hits never queue behind
+# multi-minute Deep Research calls.
+PERPLEXITY_MAX_CONCURRENCY = int(os.environ.get("PERPLEXITY_MAX_CONCURRENCY", "8"))
+_PERPLEXITY_SEM = asyncio.Semaphore(PERPLEXITY_MAX_CONCURRENCY)
+
+RETRY_ATTEMPTS = 4
+RETRY_STATUSES = frozenset({429, 502, 503})
+
 
 class PerplexityNotAvailable(Exception):
     """Raised when Perplexity API is not configured or unavailable."""
@@ -111,28 +147,226 @@ Research extensively and provide your response as a JSON object:
 Be exhaustive. This is a DEEP research report. Cover every angle. Extract every IOC. Map every TTP. Identify intelligence gaps."""
 
 
+# Perplexity's type labels, lowercase. Built once at import rather than on
+# every IOC of a (possibly hundreds-long) deep research bundle.
+_IOC_TYPE_MAP: dict[str, IOCType] = {
+    "ip": IOCType.IP,
+    "ipv4": IOCType.IP,
+    "ipv6": IOCType.IP,
+    "domain": IOCType.DOMAIN,
+    "hash_md5": IOCType.HASH_MD5,
+    "md5": IOCType.HASH_MD5,
+    "hash_sha1": IOCType.HASH_SHA1,
+    "sha1": IOCType.HASH_SHA1,
+    "hash_sha256": IOCType.HASH_SHA256,
+    "sha256": IOCType.HASH_SHA256,
+    "url": IOCType.URL,
+    "email": IOCType.EMAIL,
+    "cve": IOCType.CVE,
+}
+
+
 def _parse_ioc_type(type_str: str) -> IOCType:
     """Map a string IOC type to the IOCType enum."""
-    mapping = {
-        "ip": IOCType.IP,
-        "ipv4": IOCType.IP,
-        "ipv6": IOCType.IP,
-        "domain": IOCType.DOMAIN,
-        "hash_md5": IOCType.HASH_MD5,
-        "md5": IOCType.HASH_MD5,
-        "hash_sha1": IOCType.HASH_SHA1,
-        "sha1": IOCType.HASH_SHA1,
-        "hash_sha256": IOCType.HASH_SHA256,
-        "sha256": IOCType.HASH_SHA256,
-        "url": IOCType.URL,
-        "email": IOCType.EMAIL,
-        "cve": IOCType.CVE,
-    }
-    return mapping.get(type_str.lower(), IOCType.DOMAIN)
+    # The model almost always answers in lowercase; skip .lower() then
+    ioc_type = _IOC_TYPE_MAP.get(type_str)
+    if ioc_type is not None:
+        return ioc_type
+    return _IOC_TYPE_MAP.get(type_str.lower(), IOCType.DOMAIN)
+
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonical_url(url: str) -> str:
+    """
+    Dedup key for a URL: scheme and host lowercased, default port and a
+    bare trailing slash dropped. The original URL is what gets stored.
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if port is not None and _DEFAULT_PORTS.get(scheme) == port:
+        netloc = netloc.rsplit(":", 1)[0]
+    path = "" if parts.path in ("", "/") else parts.path
+    return urlunsplit((scheme, netloc, path, parts.query, parts.fragment))
+
+
+def _build_ioc(d: dict) -> Optional[IOC]:
+    """Build an IOC from a response dict, or None if its value is missing or malformed."""
+    value = d.get("value")
+    if not value:
+        return None
+    ioc_type = _parse_ioc_type(d.get("type", "domain"))
+    value = value.strip()
+    if not _is_valid_ioc(ioc_type, value):
+        # A bare host labelled "url" is still a usable domain indicator
+        if ioc_type is IOCType.URL and _is_valid_ioc(IOCType.DOMAIN, value):
+            ioc_type = IOCType.DOMAIN
+        else:
+            logger.warning("Skipping malformed %s IOC: %.100s", ioc_type.value, value)
+            return None
+    return IOC(
+        type=ioc_type,
+        value=value,
+        context=d.get("context", ""),
+    )
+
+
+def _build_technique(d: dict) -> Optional[AttackTechnique]:
+    """Build an AttackTechnique from a response dict, or None if it has no ID."""
+    # Perplexity returns "id", model expects "technique_id" (alias "techniqueId")
+    tech_id = d.get("technique_id") or d.get("id")
+    if not tech_id:
+        return None
+    return AttackTechnique(
+        technique_id=tech_id,
+        name=d.get("name", ""),
+        tactic=d.get("tactic", ""),
+        description=d.get("description", ""),
+    )
+
+
+def _build_items(items, build, label: str) -> list:
+    """
+    Build model objects from the response's dicts, dropping empty entries.
+
+    The whole list is built without per-item exception handling; only when
+    something in it is malformed is it rebuilt item by item, skipping the
+    items that fail.
+    """
+    if not items:
+        return []
+    try:
+        return [obj for d in items if (obj := build(d)) is not None]
+    except Exception:
+        pass
+
+    built = []
+    for d in items:
+        try:
+            obj = build(d)
+        except Exception as e:
+            logger.warning("Skipping malformed %s: %s", label, e)
+            continue
+        if obj is not None:
+            built.append(obj)
+    return built
+
+
+# Shape checks per IOC type, so prose, placeholders and injected junk in the
+# model's "value" fields never reach the report. They only check syntax and
+# accept the defanged forms analysts write (evil[.]com, hxxp://).
+
+_MD5_RE = re.compile(r"[0-9a-fA-F]{32}")
+_SHA1_RE = re.compile(r"[0-9a-fA-F]{40}")
+_SHA256_RE = re.compile(r"[0-9a-fA-F]{64}")
+_CVE_ID_RE = re.compile(r"CVE-\d{4}-\d{4,}", re.IGNORECASE)
+_DOMAIN_NAME_RE = re.compile(
+    r"(?:[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9])?\.)+[a-z][a-z0-9-]{1,62}\.?", re.IGNORECASE,
+)
+# With a scheme, or scheme-less as host[:port]/path (evil.com/payload.exe);
+# a bare host without a path is a domain, not a URL
+_URL_SHAPE_RE = re.compile(
+    r"(?:(?:https?|ftp)://[^\s/?#]+|[^\s/?#:@]+\.[^\s/?#:@]+(?::\d{1,5})?/)\S*", re.IGNORECASE,
+)
+_EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+_DEFANGS = (("[.]", "."), ("(.)", "."), ("[:]", ":"), ("[@]", "@"), ("hxxp", "http"))
 
 
-def _parse_response(raw: dict, tier: ResearchTier) -> ResearchBundle:
-    """Parse Perplexity API response into a ResearchBundle."""
+@lru_cache(maxsize=4096)
+def _is_ip(value: str) -> bool:
+    """Accept an address, a CIDR range, or an address with a :port suffix."""
+    try:
+        if "/" in value:
+            ipaddress.ip_network(value, strict=False)
+        else:
+            ipaddress.ip_address(value)
+        return True
+    except ValueError:
+        pass
+    # 1.2.3.4:8080 or [2001:db8::1]:443
+    host, sep, port = value.rpartition(":")
+    if not sep or not port.isdigit() or int(port) > 65535:
+        return False
+    if host.startswith("[") and host.endswith("]"):
+        host = host[1:-1]
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+_IOC_VALIDATORS = {
+    IOCType.IP: _is_ip,
+    IOCType.DOMAIN: _DOMAIN_NAME_RE.fullmatch,
+    IOCType.HASH_MD5: _MD5_RE.fullmatch,
+    IOCType.HASH_SHA1: _SHA1_RE.fullmatch,
+    IOCType.HASH_SHA256: _SHA256_RE.fullmatch,
+    IOCType.URL: _URL_SHAPE_RE.fullmatch,
+    IOCType.EMAIL: _EMAIL_RE.fullmatch,
+    IOCType.CVE: _CVE_ID_RE.fullmatch,
+}
+
+
+def _is_valid_ioc(ioc_type: IOCType, value: str) -> bool:
+    """Return True if value is syntactically an indicator of ioc_type."""
+    if "[" in value or "(" in value or "hxxp" in value:
+        for fanged, plain in _DEFANGS:
+            value = value.replace(fanged, plain)
+    validate = _IOC_VALIDATORS.get(ioc_type)
+    return validate is None or bool(validate(value))
+
+
+def _decode_content(content) -> Optional[dict]:
+    """
+    Decode the JSON report out of the assistant message.
+
+    Content that is already an object is used as is. A string is decoded
+    directly only when it looks like bare JSON; otherwise the object is
+    located inside a markdown code block (or the surrounding prose) and only
+    that slice is decoded, instead of first failing on the whole text.
+    """
+    if isinstance(content, dict):
+        return content
+    if not isinstance(content, str) or not content:
+        return None
+
+    stripped = content.strip()
+    if stripped.startswith("{") and stripped.endswith("}"):
+        try:
+            data = orjson.loads(stripped)
+        except orjson.JSONDecodeError:
+            pass  # e.g. two objects back to back; the scanner takes the first
+        else:
+            return data if isinstance(data, dict) else None
+
+    # The scanner tracks string literals, so a "}" inside a value doesn't
+    # cut the object short
+    fence = _JSON_FENCE_RE.search(content)
+    candidate = extract_balanced_json(content, fence.end() if fence else 0)
+    if not candidate:
+        return None
+    try:
+        data = orjson.loads(candidate)
+    except orjson.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _parse_response(raw: dict, tier: ResearchTier) -> tuple[ResearchBundle, bool]:
+    """
+    Parse Perplexity API response into a ResearchBundle.
+
+    Also returns whether the report JSON was decoded; False means the bundle
+    falls back to the raw message text.
+    """
     # Extract the assistant message content
     choices = raw.get("choices", [])
     if not choices:
@@ -141,19 +375,9 @@ def _parse_response(raw: dict, tier: ResearchTier) -> ResearchBundle:
     content = choices[0].get("message", {}).get("content", "")
     citations = raw.get("citations", [])
 
-    # Try to parse as JSON
-    data = None
-    try:
-        # Try direct JSON parse
-        data = json.loads(content)
-    except json.JSONDecodeError:
-        # Try extracting JSON from markdown code block
-        json_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", content, re.DOTALL)
-        if json_match:
-            try:
-                data = json.loads(json_match.group(1))
-            except json.JSONDecodeError:
-                pass
+    data = _decode_content(content)
+    if isinstance(content, dict):
+        content = orjson.dumps(content).decode()
 
     if not data:
         # Fall back to treating the whole response as synthesized content
@@ -163,8 +387,7 @@ def _parse_response(raw: dict, tier: ResearchTier) -> ResearchBundle:
             for i, url in enumerate(citations)
         ] if citations else []
 
-        from datetime import datetime, timezone
-        now_iso = datetime.now(timezone.utc).isoformat()
+        now_iso = datetime.now(timezone.utc).isoformat(timespec="seconds")
         sources = [
             ReportSource(
                 title=f"Source {i+1}",
@@ -174,7 +397,7 @@ def _parse_response(raw: dict, tier: ResearchTier) -> ResearchBundle:
             for i, url in enumerate(citations)
         ] if citations else []
 
-        return ResearchBundle(
+        bundle = ResearchBundle(
             topic="",
             tier=tier,
             searchResults=search_results,
@@ -183,52 +406,40 @@ def _parse_response(raw: dict, tier: ResearchTier) -> ResearchBundle:
             suggestedTechniques=[],
             sources=sources,
         )
+        return bundle, False
 
-    # Parse structured response
+    # Parse structured response. The model often lists a source in
+    # search_results and citations with cosmetic URL differences, so
+    # duplicates are caught on the canonical form.
     search_results = []
+    seen_urls: set[str] = set()
     for sr in data.get("search_results", []):
+        url = sr.get("url", "")
+        if url:
+            key = canonical_url(url)
+            if key in seen_urls:
+                continue
+            seen_urls.add(key)
         search_results.append(SearchResult(
             title=sr.get("title", ""),
-            url=sr.get("url", ""),
+            url=url,
             snippet=sr.get("snippet", ""),
         ))
 
     # Add citation URLs that aren't already in search results
-    existing_urls = {r.url for r in search_results}
     for url in citations:
-        if url not in existing_urls:
+        key = canonical_url(url)
+        if key not in seen_urls:
+            seen_urls.add(key)
             search_results.append(SearchResult(
                 title="", url=url, snippet=""
             ))
 
-    iocs = []
-    for ioc_data in data.get("iocs", []):
-        try:
-            iocs.append(IOC(
-                type=_parse_ioc_type(ioc_data.get("type", "domain")),
-                value=ioc_data.get("value", ""),
-                context=ioc_data.get("context", ""),
-            ))
-        except Exception as e:
-            logger.warning("Skipping malformed IOC: %s", e)
-
-    techniques = []
-    for tech in data.get("techniques", []):
-        try:
-            # Perplexity returns "id", model expects "technique_id" (alias "techniqueId")
-            tech_id = tech.get("technique_id") or tech.get("id", "")
-            techniques.append(AttackTechnique(
-                technique_id=tech_id,
-                name=tech.get("name", ""),
-                tactic=tech.get("tactic", ""),
-                description=tech.get("description", ""),
-            ))
-        except Exception as e:
-            logger.warning("Skipping malformed technique: %s", e)
+    iocs = _build_items(data.get("iocs"), _build_ioc, "IOC")
+    techniques = _build_items(data.get("techniques"), _build_technique, "technique")
 
     # Convert search results to ReportSource objects for bibliography
-    from datetime import datetime, timezone
-    now_iso = datetime.now(timezone.utc).isoformat()
+    now_iso = datetime.now(timezone.utc).isoformat(timespec="seconds")
     sources = [
         ReportSource(
             title=sr.title or f"Source {i+1}",
@@ -245,7 +456,7 @@ def _parse_response(raw: dict, tier: ResearchTier) -> ResearchBundle:
         len(search_results), len(sources), len(iocs), len(techniques),
     )
 
-    return ResearchBundle(
+    bundle = ResearchBundle(
         topic="",
         tier=tier,
         searchResults=search_results,
@@ -254,26 +465,56 @@ def _parse_response(raw: dict, tier: ResearchTier) -> ResearchBundle:
         suggestedTechniques=techniques,
         sources=sources,
     )
+    return bundle, True
 
 
-async def search_perplexity_sonar(
+def _research_cache_key(model: str, topic: str, api_key: str) -> tuple[str, str, int]:
+    """Cache key for one Perplexity call; topics can be whole documents, so hash them."""
+    digest = hashlib.blake2b(topic.encode(), digest_size=16).hexdigest()
+    return model, digest, hash(api_key)
+
+
+def _cached_research(cache_key: tuple, topic: str, start: float) -> Optional[ResearchBundle]:
+    """Return a caller-owned copy of a cached bundle, or None on a miss."""
+    cached = _research_cache.get(cache_key)
+    if cached is None:
+        return None
+    logger.info("Perplexity %s cache hit for: %.200s", cache_key[0], topic)
+    # Callers overwrite metadata, so never hand out the cached instance
+    bundle = cached.model_copy(deep=True)
+    duration_ms = int((time.monotonic() - start) * 1000)
+    bundle.metadata.search_duration_ms = duration_ms
+    bundle.metadata.total_duration_ms = duration_ms
+    bundle.metadata.cache_hit = True
+    return bundle
+
+
+async def _run_perplexity(
+    *,
+    model: str,
+    system: str,
+    prompt: str,
     topic: str,
     api_key: str,
+    tier: ResearchTier,
+    timeout: float | httpx.Timeout,
+    label: str,
+    provider: str,
+    timeout_message: str,
 ) -> ResearchBundle:
     """
-    STANDARD tier: Use Perplexity Sonar for citation-backed research.
+    Run one Perplexity chat completion and parse it into a ResearchBundle.
 
-    Args:
-        topic: The threat intelligence topic to research.
-        api_key: Perplexity API key.
-
-    Returns:
-        ResearchBundle with search results and synthesized content.
+    Shared by the Sonar and Deep Research tiers: cache lookup, request,
+    error mapping, parsing and metadata all live here. `topic` can carry the
+    full combined source material (run_research_from_sources), so log calls
+    cap it with %.200s.
     """
-    if not api_key:
-        raise PerplexityNotAvailable("Perplexity API key required for Standard tier.")
-
     start = time.monotonic()
+    cache_key = _research_cache_key(model, topic, api_key)
+    cached = _cached_research(cache_key, topic, start)
+    if cached is not None:
+        return cached
 
     headers = {
         "Authorization": f"Bearer {api_key}",
@@ -281,58 +522,108 @@ async def search_perplexity_sonar(
     }
 
     payload = {
-        "model": "sonar",
+        "model": model,
         "messages": [
-            {
-                "role": "system",
-                "content": "You are a cyber threat intelligence analyst. Always respond with valid JSON. Be thorough and cite sources."
-            },
-            {
-                "role": "user",
-                "content": _build_sonar_prompt(topic),
-            },
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt},
         ],
         "temperature": 0.1,
         "return_citations": True,
         "return_related_questions": False,
     }
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        try:
-            response = await client.post(
-                PERPLEXITY_API_URL,
-                headers=headers,
-                json=payload,
+    client = get_client()
+    body = orjson.dumps(payload)
+
+    async def _send() -> httpx.Response:
+        return await client.post(
+            PERPLEXITY_API_URL,
+            headers=headers,
+            content=body,
+            timeout=timeout,
+        )
+
+    try:
+        # Rate limits and gateway errors are usually transient; a short
+        # backoff is far cheaper than failing a multi-minute research run
+        async with _PERPLEXITY_SEM:
+            response = await send_with_retry(
+                _send,
+                label=label,
+                attempts=RETRY_ATTEMPTS,
+                base_delay=1.0,
+                max_delay=10.0,
+                retry_statuses=RETRY_STATUSES,
             )
-            response.raise_for_status()
-        except httpx.TimeoutException:
-            logger.error("Perplexity Sonar timed out for topic: %s", topic)
-            raise ValueError("Perplexity request timed out. Please try again.")
-        except httpx.HTTPStatusError as e:
-            status = e.response.status_code
-            if status == 401:
-                raise ValueError("Invalid Perplexity API key.")
-            elif status == 429:
-                raise ValueError("Perplexity rate limit exceeded. Try again later.")
-            else:
-                logger.error("Perplexity HTTP error %d: %s", status, e.response.text)
-                raise ValueError(f"Perplexity API error: {status}")
-
-    raw = response.json()
+        response.raise_for_status()
+    except httpx.TimeoutException:
+        logger.error("%s timed out for topic: %.200s", label, topic)
+        raise ValueError(timeout_message)
+    except httpx.HTTPStatusError as e:
+        status = e.response.status_code
+        if status == 401:
+            raise ValueError("Invalid Perplexity API key.")
+        elif status == 429:
+            raise ValueError("Perplexity rate limit exceeded. Try again later.")
+        else:
+            logger.error("Perplexity HTTP error %d: %.500s", status, e.response.text)
+            raise ValueError(f"Perplexity API error: {status}")
+
+    raw = orjson.loads(response.content)
     duration_ms = int((time.monotonic() - start) * 1000)
-    logger.info("Perplexity Sonar completed in %dms for: %s", duration_ms, topic)
+    logger.info("%s completed in %dms for: %.200s", label, duration_ms, topic)
 
-    bundle = _parse_response(raw, ResearchTier.STANDARD)
+    bundle, parsed = _parse_response(raw, tier)
     bundle.topic = topic
     bundle.metadata = ResearchMetadata(
         search_duration_ms=duration_ms,
         synthesis_duration_ms=0,
         total_duration_ms=duration_ms,
-        search_provider="perplexity-sonar",
-        synthesis_model="sonar",
+        search_provider=provider,
+        synthesis_model=model,
     )
 
-    return bundle
+    # Don't pin a raw-text fallback or a reply cut off at the token limit
+    # (the scanner closes its brackets, so it still parses) for an hour; the
+    # next call may come back whole
+    choices = raw.get("choices") or [{}]
+    truncated = choices[0].get("finish_reason") == "length"
+    if truncated:
+        logger.warning("%s output hit the token limit for: %.200s", label, topic)
+    if parsed and not truncated:
+        _research_cache.set(cache_key, bundle)
+    return bundle.model_copy(deep=True)
+
+
+async def search_perplexity_sonar(
+    topic: str,
+    api_key: str,
+) -> ResearchBundle:
+    """
+    STANDARD tier: Use Perplexity Sonar for citation-backed research.
+
+    Args:
+        topic: The threat intelligence topic to research.
+        api_key: Perplexity API key.
+
+    Returns:
+        ResearchBundle with search results and synthesized content.
+    """
+    if not api_key:
+        raise PerplexityNotAvailable("Perplexity API key required for Standard tier.")
+
+    return await _run_perplexity(
+        model="sonar",
+        system="You are a cyber threat intelligence analyst. Always respond with valid JSON. Be thorough and cite sources.",
+        prompt=_build_sonar_prompt(topic),
+        topic=topic,
+        api_key=api_key,
+        tier=ResearchTier.STANDARD,
+        timeout=60.0,
+        label="Perplexity Sonar",
+        provider="perplexity-sonar",
+        timeout_message="Perplexity request timed out. Please try again.",
+    )
 
 
 async def deep_research_perplexity(
@@ -352,65 +643,17 @@ async def deep_research_perplexity(
     if not api_key:
         raise PerplexityNotAvailable("Perplexity API key required for Deep tier.")
 
-    start = time.monotonic()
-
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-
-    payload = {
-        "model": "sonar-deep-research",
-        "messages": [
-            {
-                "role": "system",
-                "content": "You are a senior cyber threat intelligence analyst conducting deep research. Provide exhaustive analysis with valid JSON output. Cite all sources."
-            },
-            {
-                "role": "user",
-                "content": _build_deep_prompt(topic),
-            },
-        ],
-        "temperature": 0.1,
-        "return_citations": True,
-        "return_related_questions": False,
-    }
-
+    logger.info("Starting Perplexity Deep Research for: %.200s (timeout 360s)", topic)
     # Deep research takes 2-5 minutes; use 360s timeout
-    async with httpx.AsyncClient(timeout=httpx.Timeout(360.0, connect=30.0)) as client:
-        try:
-            logger.info("Starting Perplexity Deep Research for: %s (timeout 360s)", topic)
-            response = await client.post(
-                PERPLEXITY_API_URL,
-                headers=headers,
-                json=payload,
-            )
-            response.raise_for_status()
-        except httpx.TimeoutException:
-            logger.error("Perplexity Deep Research timed out for topic: %s", topic)
-            raise ValueError("Deep research timed out after 6 minutes. Perplexity Deep Research can be slow for complex topics. Try a more specific query.")
-        except httpx.HTTPStatusError as e:
-            status = e.response.status_code
-            if status == 401:
-                raise ValueError("Invalid Perplexity API key.")
-            elif status == 429:
-                raise ValueError("Perplexity rate limit exceeded. Try again later.")
-            else:
-                logger.error("Perplexity HTTP error %d: %s", status, e.response.text)
-                raise ValueError(f"Perplexity API error: {status}")
-
-    raw = response.json()
-    duration_ms = int((time.monotonic() - start) * 1000)
-    logger.info("Perplexity Deep Research completed in %dms for: %s", duration_ms, topic)
-
-    bundle = _parse_response(raw, ResearchTier.DEEP)
-    bundle.topic = topic
-    bundle.metadata = ResearchMetadata(
-        search_duration_ms=duration_ms,
-        synthesis_duration_ms=0,
-        total_duration_ms=duration_ms,
-        search_provider="perplexity-deep-research",
-        synthesis_model="sonar-deep-research",
+    return await _run_perplexity(
+        model="sonar-deep-research",
+        system="You are a senior cyber threat intelligence analyst conducting deep research. Provide exhaustive analysis with valid JSON output. Cite all sources.",
+        prompt=_build_deep_prompt(topic),
+        topic=topic,
+        api_key=api_key,
+        tier=ResearchTier.DEEP,
+        timeout=httpx.Timeout(360.0, connect=30.0),
+        label="Perplexity Deep Research",
+        provider="perplexity-deep-research",
+        timeout_message="Deep research timed out after 6 minutes. Perplexity Deep Research can be slow for complex topics. Try a more specific query.",
     )
-
-    return bundle
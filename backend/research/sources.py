@@ -2,12 +2,21 @@
 
 from __future__ import annotations
 
+import asyncio
+import codecs
 import logging
 import re
 import time
-from typing import Optional
+from dataclasses import dataclass
+from html import unescape
+from typing import Iterable, Iterator, Optional
 
-import httpx
+from research.http_client import get_client
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:  # optional; the regex stripper below is the fallback
+    HTMLParser = None
 
 logger = logging.getLogger(__name__)
 
@@ -15,50 +24,130 @@ logger = logging.getLogger(__name__)
 MAX_URL_COUNT = 20
 MAX_TEXT_LENGTH = 500_000  # 500KB of text
 MAX_PDF_BYTES = 10 * 1024 * 1024  # 10MB per PDF
+MAX_PAGE_BYTES = 2 * 1024 * 1024  # HTML read past this is dropped
+MAX_SNIPPET_CHARS = 10_000  # extracted text kept per source
+PDF_TEXT_BUDGET = 12_000  # stop reading PDF pages once this much text is in
 FETCH_TIMEOUT = 15.0
 
+# HTML cleanup patterns, compiled once for every fetched page
+_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+# Script/style/nav/header/footer blocks (common noise) or any other tag; the
+# text between matches is the readable content
+_MARKUP_RE = re.compile(
+    r"<(script|style|nav|header|footer)[^>]*>.*?</\1>|<[^>]+>", re.IGNORECASE | re.DOTALL,
+)
+_WS_RE = re.compile(r"\s+")
+
+
+@dataclass(slots=True)
+class ExtractedSource:
+    """Readable content pulled from a URL, PDF, or raw text."""
+
+    title: str
+    url: str
+    snippet: str
+
 
-async def extract_from_url(url: str) -> Optional[dict]:
+def _codec_or_utf8(charset: Optional[str]) -> str:
+    """The declared charset if Python knows it, else UTF-8 (e.g. for "utf8mb4")."""
+    if charset:
+        try:
+            return codecs.lookup(charset).name
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+async def extract_from_url(url: str) -> Optional[ExtractedSource]:
     """Fetch a URL and extract readable text content.
     
-    Returns dict with title, url, snippet (extracted text), or None on failure.
+    Returns an ExtractedSource (snippet holds the extracted text), or None on failure.
     """
     try:
-        async with httpx.AsyncClient(
-            timeout=FETCH_TIMEOUT,
+        # Shared pool: repeat hosts reuse connections across sources and runs.
+        # Streamed so oversized bodies are cut off instead of fully buffered.
+        async with get_client().stream(
+            "GET",
+            url,
             follow_redirects=True,
-            headers={"User-Agent": "CyberBRIEF/1.0 (Threat Intelligence Research)"},
-        ) as client:
-            resp = await client.get(url)
+            timeout=FETCH_TIMEOUT,
+        ) as resp:
             resp.raise_for_status()
-            
+
             content_type = resp.headers.get("content-type", "")
-            
-            # PDF handling
-            if "pdf" in content_type.lower() or url.lower().endswith(".pdf"):
-                return await _extract_pdf_bytes(resp.content, url)
-            
-            # HTML/text handling
-            text = resp.text
-            
-            # Strip HTML tags (basic extraction)
-            title = _extract_title(text) or url
-            clean = _strip_html(text)
-            
-            # Truncate to reasonable size
-            snippet = clean[:10000]
-            
-            return {
-                "title": title,
-                "url": url,
-                "snippet": snippet,
-            }
+            is_pdf = "pdf" in content_type.lower() or url.lower().endswith(".pdf")
+            limit = MAX_PDF_BYTES if is_pdf else MAX_PAGE_BYTES
+
+            declared = resp.headers.get("content-length", "")
+            if is_pdf and declared.isdigit() and int(declared) > MAX_PDF_BYTES:
+                logger.warning("PDF too large (%s bytes), skipping: %s", declared, url)
+                return None
+
+            buf = bytearray()
+            async for chunk in resp.aiter_bytes(65536):
+                buf += chunk
+                if len(buf) > limit:
+                    if is_pdf:
+                        logger.warning("PDF exceeds %d bytes, skipping: %s", MAX_PDF_BYTES, url)
+                        return None
+                    del buf[limit:]
+                    break
+            encoding = _codec_or_utf8(resp.charset_encoding)
+
+        # PDF handling; PyMuPDF reads a bytearray as-is, so skip the bytes() copy
+        if is_pdf:
+            return await _extract_pdf_bytes(buf, url)
+        
+        # HTML/text handling. Drop the raw body once decoded so it isn't held
+        # alongside the str (up to 4x its size) while the page is parsed.
+        text = buf.decode(encoding, "replace")
+        del buf
+        
+        title, snippet = _extract_html(text, MAX_SNIPPET_CHARS)
+        title = title or url
+        
+        return ExtractedSource(title=title, url=url, snippet=snippet)
     except Exception as e:
         logger.warning("Failed to fetch URL %s: %s", url, e)
         return None
 
 
-async def _extract_pdf_bytes(content: bytes, url: str) -> Optional[dict]:
+async def extract_from_urls(urls: list[str], concurrency: int = 8) -> list[ExtractedSource]:
+    """Fetch up to MAX_URL_COUNT URLs concurrently, at most `concurrency` at a time.
+
+    Returns the successfully extracted sources in input order; failures are
+    logged and dropped.
+    """
+    if len(urls) > MAX_URL_COUNT:
+        logger.warning("Fetching only the first %d of %d URLs", MAX_URL_COUNT, len(urls))
+        urls = urls[:MAX_URL_COUNT]
+
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _bounded(url: str) -> Optional[ExtractedSource]:
+        async with sem:
+            return await extract_from_url(url)
+
+    results = await asyncio.gather(*(_bounded(u) for u in urls), return_exceptions=True)
+    extracted: list[ExtractedSource] = []
+    for url, result in zip(urls, results):
+        if isinstance(result, BaseException):
+            logger.warning("Failed to fetch URL %s: %s", url, result)
+        elif result is not None:
+            extracted.append(result)
+    return extracted
+
+
+async def _extract_pdf_bytes(content: bytes | bytearray, url: str) -> Optional[ExtractedSource]:
+    """Extract text from PDF bytes off the event loop.
+
+    PyMuPDF parsing is synchronous and can take seconds on a large PDF, so
+    it runs in a worker thread and concurrent fetches keep progressing.
+    """
+    return await asyncio.to_thread(_extract_pdf_sync, content, url)
+
+
+def _extract_pdf_sync(content: bytes | bytearray, url: str) -> Optional[ExtractedSource]:
     """Extract text from PDF bytes using pymupdf if available, else basic fallback."""
     if len(content) > MAX_PDF_BYTES:
         logger.warning("PDF too large (%d bytes), skipping: %s", len(content), url)
@@ -67,69 +156,110 @@ async def _extract_pdf_bytes(content: bytes, url: str) -> Optional[dict]:
     try:
         import fitz  # pymupdf
         doc = fitz.open(stream=content, filetype="pdf")
+        # The get_text("text") defaults (ligatures, whitespace, mediabox clip,
+        # CID fallback) plus dehyphenation
+        flags = fitz.TEXTFLAGS_TEXT | fitz.TEXT_DEHYPHENATE
+        # Only the first 10,000 characters are kept, so don't extract the
+        # rest of a several-hundred-page report
         text_parts = []
-        for page in doc:
-            text_parts.append(page.get_text())
-        doc.close()
+        total = 0
+        try:
+            for page in doc:
+                text = page.get_text("text", flags=flags)
+                text_parts.append(text)
+                total += len(text)
+                if total >= PDF_TEXT_BUDGET:
+                    break
+        finally:
+            doc.close()
         
         full_text = "\n".join(text_parts)
         title = url.split("/")[-1].replace(".pdf", "").replace("-", " ").replace("_", " ")
         
-        return {
-            "title": title,
-            "url": url,
-            "snippet": full_text[:10000],
-        }
+        return ExtractedSource(title=title, url=url, snippet=full_text[:MAX_SNIPPET_CHARS])
     except ImportError:
         logger.warning("pymupdf not installed, cannot extract PDF text from: %s", url)
-        return {
-            "title": url.split("/")[-1],
-            "url": url,
-            "snippet": "[PDF content — install pymupdf for text extraction]",
-        }
+        return ExtractedSource(
+            title=url.split("/")[-1],
+            url=url,
+            snippet="[PDF content — install pymupdf for text extraction]",
+        )
     except Exception as e:
         logger.warning("PDF extraction failed for %s: %s", url, e)
         return None
 
 
-def extract_from_text(text: str, label: str = "User-provided text") -> dict:
+def extract_from_text(text: str, label: str = "User-provided text") -> ExtractedSource:
     """Wrap raw text as a source entry."""
-    return {
-        "title": label,
-        "url": "user-input",
-        "snippet": text[:10000],
-    }
+    return ExtractedSource(title=label, url="user-input", snippet=text[:MAX_SNIPPET_CHARS])
+
+
+def _extract_html(html: str, budget: int) -> tuple[Optional[str], str]:
+    """Return the <title> and up to `budget` chars of readable page text.
+
+    Uses selectolax's C parser when installed, otherwise the regex-based
+    _extract_title/_strip_html pair. Either way, text collection stops once
+    the budget is met rather than processing the whole page.
+    """
+    if HTMLParser is None:
+        return _extract_title(html), _strip_html(html, budget)
+
+    tree = HTMLParser(html)
+    title_node = tree.css_first("title")
+    title = title_node.text(strip=True)[:200] if title_node else None
+    for node in tree.css("script, style, nav, header, footer"):
+        node.decompose()
+    root = tree.body or tree.root
+    if root is None:
+        return title or None, ""
+    chunks = (
+        node.text(deep=False)
+        for node in root.traverse(include_text=True)
+        if node.tag == "-text"
+    )
+    return title or None, _join_text(chunks, budget)
+
+
+def _join_text(chunks: Iterable[str], budget: int) -> str:
+    """Join text chunks with single spaces, collapsing whitespace.
+
+    Stops pulling chunks once `budget` characters are in, so a large page
+    costs about as much as a small one.
+    """
+    parts: list[str] = []
+    total = 0
+    for chunk in chunks:
+        chunk = _WS_RE.sub(" ", chunk).strip()
+        if not chunk:
+            continue
+        parts.append(chunk)
+        total += len(chunk) + 1
+        if total >= budget:
+            break
+    return " ".join(parts)[:budget]
 
 
 def _extract_title(html: str) -> Optional[str]:
     """Extract <title> from HTML."""
-    match = re.search(r"<title[^>]*>(.*?)</title>", html, re.IGNORECASE | re.DOTALL)
+    match = _TITLE_RE.search(html)
     if match:
-        title = match.group(1).strip()
-        # Clean up HTML entities
-        title = re.sub(r"&amp;", "&", title)
-        title = re.sub(r"&lt;", "<", title)
-        title = re.sub(r"&gt;", ">", title)
-        title = re.sub(r"&#\d+;", "", title)
+        # unescape turns &nbsp; into U+00A0, which _WS_RE folds to a space
+        title = _WS_RE.sub(" ", unescape(match.group(1))).strip()
         return title[:200]
     return None
 
 
-def _strip_html(html: str) -> str:
-    """Strip HTML tags and collapse whitespace for readable text extraction."""
-    # Remove script and style blocks
-    text = re.sub(r"<script[^>]*>.*?</script>", " ", html, flags=re.IGNORECASE | re.DOTALL)
-    text = re.sub(r"<style[^>]*>.*?</style>", " ", text, flags=re.IGNORECASE | re.DOTALL)
-    # Remove nav, header, footer blocks (common noise)
-    text = re.sub(r"<(nav|header|footer)[^>]*>.*?</\1>", " ", text, flags=re.IGNORECASE | re.DOTALL)
-    # Strip remaining tags
-    text = re.sub(r"<[^>]+>", " ", text)
-    # Decode common entities
-    text = re.sub(r"&nbsp;", " ", text)
-    text = re.sub(r"&amp;", "&", text)
-    text = re.sub(r"&lt;", "<", text)
-    text = re.sub(r"&gt;", ">", text)
-    text = re.sub(r"&quot;", '"', text)
-    # Collapse whitespace
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+def _strip_html(html: str, budget: int) -> str:
+    """Strip HTML tags and collapse whitespace, keeping up to `budget` chars.
+
+    Noise blocks and tags are skipped as the page is scanned, and the scan
+    stops as soon as enough text has been collected.
+    """
+    def _chunks() -> Iterator[str]:
+        pos = 0
+        for m in _MARKUP_RE.finditer(html):
+            yield unescape(html[pos:m.start()])
+            pos = m.end()
+        yield unescape(html[pos:])
+
+    return _join_text(_chunks(), budget)
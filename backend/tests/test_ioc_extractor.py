@@ -0,0 +1,35 @@
+import pytest
+
+from models import IOCType
+from report.ioc_extractor import extract_iocs
+
+
+def _values(text: str, ioc_type: IOCType) -> set[str]:
+    return {ioc.value for ioc in extract_iocs(text) if ioc.type == ioc_type}
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Contact Telefónica.com for details.",
+        "Seen in münchen.de logs.",
+        "Ordered from bücher.org yesterday.",
+    ],
+)
+def test_domain_does_not_start_inside_accented_word(text):
+    assert _values(text, IOCType.DOMAIN) == set()
+
+
+def test_hash_does_not_start_after_non_ascii_letter():
+    digest = "d41d8cd98f00b204e9800998ecf8427e"
+    assert _values("ß" + digest, IOCType.MD5) == set()
+    assert _values("é" + "a" * 64, IOCType.SHA256) == set()
+
+
+def test_indicators_next_to_non_ascii_punctuation_still_match():
+    digest = "d41d8cd98f00b204e9800998ecf8427e"
+    text = f"Domain «evil-site.ru», hash {digest} and CVE-2024-3400 — 203.0.113.7."
+    assert _values(text, IOCType.DOMAIN) == {"evil-site.ru"}
+    assert _values(text, IOCType.MD5) == {digest}
+    assert _values(text, IOCType.CVE) == {"CVE-2024-3400"}
+    assert _values(text, IOCType.IPV4) == {"203.0.113.7"}
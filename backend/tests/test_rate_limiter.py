@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+import pytest
+
+from research.http_client import RateLimiter
+
+
+def test_fractional_rate_spaces_calls_instead_of_hanging():
+    # 0.5 per 0.1s: one call immediately, then one every 0.2s
+    limiter = RateLimiter(max_rate=0.5, time_period=0.1)
+
+    async def run() -> float:
+        start = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire()
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(asyncio.wait_for(run(), timeout=2.0))
+    assert 0.35 <= elapsed < 1.0
+
+
+def test_whole_rate_allows_burst_up_to_capacity():
+    limiter = RateLimiter(max_rate=3, time_period=10.0)
+
+    async def run() -> None:
+        for _ in range(3):
+            await limiter.acquire()
+
+    asyncio.run(asyncio.wait_for(run(), timeout=0.5))
+
+
+@pytest.mark.parametrize("rate", [0, -1])
+def test_non_positive_rate_is_rejected(rate):
+    with pytest.raises(ValueError):
+        RateLimiter(max_rate=rate)
@@ -136,6 +136,7 @@ export interface ResearchBundle {
     totalDurationMs: number;
     searchProvider: string;
     synthesisModel: string;
+    cacheHit?: boolean;
   };
 }
 